@@ -19,11 +19,13 @@
 from __future__ import annotations
 
 
+import functools
 import sys
 from enum import Enum
 from types import SimpleNamespace
-from typing import Iterable, Optional, Sequence, Type, TypeVar
+from typing import List, Optional, Sequence, Type, TypeVar
 
+import click
 import typer
 from typing_extensions import Annotated
 
@@ -64,6 +66,14 @@ def _to_bool(value: bool | str) -> bool:
     return str2bool(value)
 
 
+def _split_ids(value: str) -> List[str]:
+    """Split a comma separated ID string, stripping each element once."""
+
+    if not value:
+        return []
+    return [item for item in (raw.strip() for raw in value.split(",")) if item]
+
+
 def _coerce_enum(
     enum_cls: Type[EnumT],
     value: EnumT | str,
@@ -74,24 +84,27 @@ def _coerce_enum(
     if isinstance(value, enum_cls):
         return value
 
-    try:
-        return enum_cls(value)
-    except ValueError:
+    # Direct value lookup; avoids Enum.__call__ raising ValueError on a miss
+    member = enum_cls._value2member_map_.get(value)
+    if member is None:
         typer.secho(
             f"Warning: Config value '{value}' is not within the supported range of {enum_cls.__name__}, falling back to default value '{default.value}'.",
             fg=typer.colors.YELLOW,
         )
         return default
+    return member
 
 
-def _normalize_argv(argv: Optional[Sequence[str]]) -> Iterable[str]:
+def _normalize_argv(argv: Optional[Sequence[str]]) -> Sequence[str]:
+    # Click copies the args itself, so no list() copy is needed here
     if argv is None:
-        return list(sys.argv[1:])
-    return list(argv)
+        return sys.argv[1:]
+    return argv
 
 
-async def parse_cmd(argv: Optional[Sequence[str]] = None):
-    """Parse command line arguments using Typer."""
+@functools.lru_cache(maxsize=1)
+def _build_command() -> click.Command:
+    """Build the Typer CLI once; option defaults are taken from config at first call."""
 
     app = typer.Typer(add_completion=False)
 
@@ -198,8 +211,8 @@ async def parse_cmd(argv: Optional[Sequence[str]] = None):
         enable_headless = _to_bool(headless)
 
         # Parse specified_id and creator_id into lists
-        specified_id_list = [id.strip() for id in specified_id.split(",") if id.strip()] if specified_id else []
-        creator_id_list = [id.strip() for id in creator_id.split(",") if id.strip()] if creator_id else []
+        specified_id_list = _split_ids(specified_id)
+        creator_id_list = _split_ids(creator_id)
 
         # override global config
         config.LOGIN_TYPE = lt.value
@@ -234,12 +247,17 @@ async def parse_cmd(argv: Optional[Sequence[str]] = None):
             creator_id=creator_id,
         )
 
-    command = typer.main.get_command(app)
+    return typer.main.get_command(app)
+
+
+async def parse_cmd(argv: Optional[Sequence[str]] = None):
+    """Parse command line arguments using Typer."""
 
+    command = _build_command()
     cli_args = _normalize_argv(argv)
 
     try:
-        result = command.main(args=list(cli_args), standalone_mode=False)
+        result = command.main(args=cli_args, standalone_mode=False)
         if isinstance(result, int):  # help/options handled by Typer; propagate exit code
             raise SystemExit(result)
         return result
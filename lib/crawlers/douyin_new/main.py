@@ -20,12 +20,20 @@ import io
 
 # Force UTF-8 encoding for stdout/stderr to prevent encoding errors
 # when outputting Chinese characters in non-UTF-8 terminals
-if sys.stdout and hasattr(sys.stdout, 'buffer'):
-    if sys.stdout.encoding and sys.stdout.encoding.lower() != 'utf-8':
-        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
-if sys.stderr and hasattr(sys.stderr, 'buffer'):
-    if sys.stderr.encoding and sys.stderr.encoding.lower() != 'utf-8':
-        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+def _force_utf8(stream):
+    if not stream or not stream.encoding or stream.encoding.lower() == 'utf-8':
+        return stream
+    # Reconfigure in place where possible to keep the stream's line buffering
+    if hasattr(stream, 'reconfigure'):
+        stream.reconfigure(encoding='utf-8', errors='replace')
+        return stream
+    if hasattr(stream, 'buffer'):
+        return io.TextIOWrapper(stream.buffer, encoding='utf-8', errors='replace')
+    return stream
+
+
+sys.stdout = _force_utf8(sys.stdout)
+sys.stderr = _force_utf8(sys.stderr)
 
 from typing import Optional
 
@@ -42,10 +50,10 @@ def _flush_excel_if_needed() -> None:
         return
 
     try:
-        from store.douyin_store_impl import DouyinExcelStoreImplement
-        # Flush all Excel instances
-        for instance in DouyinExcelStoreImplement._instances.values():
-            instance.save()
+        # Imported lazily: only excel runs need openpyxl/xlsxwriter loaded.
+        # DouyinExcelStoreImplement hands out ExcelStoreBase singletons
+        from store.excel_store_base import ExcelStoreBase
+        ExcelStoreBase.flush_all()
         print("[Main] Excel files saved successfully")
     except Exception as e:
         print(f"[Main] Error flushing Excel data: {e}")
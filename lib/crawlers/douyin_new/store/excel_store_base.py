@@ -8,12 +8,28 @@ from pathlib import Path
 
 try:
     import openpyxl
+    from openpyxl.cell import WriteOnlyCell
     from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
     from openpyxl.utils import get_column_letter
     EXCEL_AVAILABLE = True
+
+    # Style objects are immutable, so one instance is shared by every cell
+    _THIN = Side(style='thin')
+    _BORDER = Border(left=_THIN, right=_THIN, top=_THIN, bottom=_THIN)
+    _ROW_ALIGN = Alignment(vertical="top", wrap_text=True)
+    _HEADER_FILL = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
+    _HEADER_FONT = Font(bold=True, color="FFFFFF", size=11)
+    _HEADER_ALIGN = Alignment(horizontal="center", vertical="center", wrap_text=True)
 except ImportError:
     EXCEL_AVAILABLE = False
 
+# Optional faster backend: streams rows to disk in constant-memory mode
+try:
+    import xlsxwriter
+    XLSXWRITER_AVAILABLE = True
+except ImportError:
+    XLSXWRITER_AVAILABLE = False
+
 from base.base_crawler import AbstractStore
 from tools import utils
 
@@ -29,10 +45,15 @@ class ExcelStoreBase(AbstractStore):
     @classmethod
     def get_instance(cls, platform: str, crawler_type: str) -> "ExcelStoreBase":
         key = f"{platform}_{crawler_type}"
+        # Dict reads are atomic under the GIL, so the lock is only taken on creation
+        instance = cls._instances.get(key)
+        if instance is not None:
+            return instance
         with cls._lock:
-            if key not in cls._instances:
-                cls._instances[key] = cls(platform, crawler_type)
-            return cls._instances[key]
+            instance = cls._instances.get(key)
+            if instance is None:
+                instance = cls._instances[key] = cls(platform, crawler_type)
+            return instance
 
     @classmethod
     def flush_all(cls):
@@ -46,9 +67,9 @@ class ExcelStoreBase(AbstractStore):
             cls._instances.clear()
 
     def __init__(self, platform: str, crawler_type: str = "search"):
-        if not EXCEL_AVAILABLE:
+        if not EXCEL_AVAILABLE and not XLSXWRITER_AVAILABLE:
             raise ImportError(
-                "openpyxl is required for Excel export. "
+                "openpyxl or xlsxwriter is required for Excel export. "
                 "Install it with: pip install openpyxl"
             )
 
@@ -59,116 +80,151 @@ class ExcelStoreBase(AbstractStore):
         self.data_dir = Path("data") / platform / "excel"
         self.data_dir.mkdir(parents=True, exist_ok=True)
 
-        self.workbook = openpyxl.Workbook()
-        self.workbook.remove(self.workbook.active)
-
-        self.contents_sheet = self.workbook.create_sheet("Contents")
-        self.comments_sheet = self.workbook.create_sheet("Comments")
-        self.creators_sheet = self.workbook.create_sheet("Creators")
-
-        self.contents_headers_written = False
-        self.comments_headers_written = False
-        self.creators_headers_written = False
-
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         self.filename = self.data_dir / f"{platform}_{crawler_type}_{timestamp}.xlsx"
 
+        self._headers: Dict[str, List[str]] = {}
+        self._col_widths: Dict[str, List[int]] = {}
+
+        self.use_xlsxwriter = XLSXWRITER_AVAILABLE
+        if self.use_xlsxwriter:
+            # xlsxwriter writes each row straight to a temp file; the workbook is
+            # created on the first row so an empty export never produces a file
+            self.workbook = None
+            self._xlsx_sheets: Dict[str, Any] = {}
+            self._next_row: Dict[str, int] = {}
+        else:
+            # Write-only mode streams rows to disk on save instead of building a cell grid,
+            # so rows are buffered per sheet and appended in flush()
+            self.workbook = openpyxl.Workbook(write_only=True)
+            self._rows: Dict[str, List[List[Any]]] = {
+                "Contents": [],
+                "Comments": [],
+                "Creators": [],
+            }
+
         utils.logger.info(f"[ExcelStoreBase] Initialized Excel export to: {self.filename}")
 
-    def _apply_header_style(self, sheet, row_num: int = 1):
-        header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-        header_font = Font(bold=True, color="FFFFFF", size=11)
-        header_alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
-        border = Border(
-            left=Side(style='thin'),
-            right=Side(style='thin'),
-            top=Side(style='thin'),
-            bottom=Side(style='thin')
-        )
-
-        for cell in sheet[row_num]:
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.alignment = header_alignment
-            cell.border = border
-
-    def _auto_adjust_column_width(self, sheet):
-        for column in sheet.columns:
-            max_length = 0
-            column_letter = get_column_letter(column[0].column)
-
-            for cell in column:
-                try:
-                    if cell.value:
-                        max_length = max(max_length, len(str(cell.value)))
-                except (TypeError, AttributeError):
-                    pass
-
-            adjusted_width = min(max(max_length + 2, 10), 50)
-            sheet.column_dimensions[column_letter].width = adjusted_width
-
-    def _write_headers(self, sheet, headers: List[str]):
-        for col_num, header in enumerate(headers, 1):
-            sheet.cell(row=1, column=col_num, value=header)
-        self._apply_header_style(sheet)
-
-    def _write_row(self, sheet, data: Dict[str, Any], headers: List[str]):
-        row_num = sheet.max_row + 1
-
-        for col_num, header in enumerate(headers, 1):
-            value = data.get(header, "")
-
-            if isinstance(value, (list, dict)):
-                value = str(value)
-            elif value is None:
-                value = ""
-
-            cell = sheet.cell(row=row_num, column=col_num, value=value)
-            cell.alignment = Alignment(vertical="top", wrap_text=True)
-            cell.border = Border(
-                left=Side(style='thin'),
-                right=Side(style='thin'),
-                top=Side(style='thin'),
-                bottom=Side(style='thin')
-            )
+    @staticmethod
+    def _cell_value(value: Any) -> Any:
+        if isinstance(value, (list, dict)):
+            return str(value)
+        if value is None:
+            return ""
+        return value
+
+    def _header_cells(self, sheet, headers: List[str]) -> List["WriteOnlyCell"]:
+        cells = []
+        for header in headers:
+            cell = WriteOnlyCell(sheet, value=header)
+            cell.fill = _HEADER_FILL
+            cell.font = _HEADER_FONT
+            cell.alignment = _HEADER_ALIGN
+            cell.border = _BORDER
+            cells.append(cell)
+        return cells
+
+    @staticmethod
+    def _row_cell(sheet, value: Any) -> "WriteOnlyCell":
+        cell = WriteOnlyCell(sheet, value=value)
+        cell.alignment = _ROW_ALIGN
+        cell.border = _BORDER
+        return cell
+
+    @staticmethod
+    def _adjusted_width(max_length: int) -> int:
+        return min(max(max_length + 2, 10), 50)
+
+    def _auto_adjust_column_width(self, sheet, widths: List[int]):
+        for col_idx, max_length in enumerate(widths, 1):
+            sheet.column_dimensions[get_column_letter(col_idx)].width = self._adjusted_width(max_length)
+
+    def _add_row(self, sheet_name: str, item: Dict[str, Any]):
+        headers = self._headers.get(sheet_name)
+        if headers is None:
+            headers = self._headers[sheet_name] = list(item.keys())
+            self._col_widths[sheet_name] = [len(header) for header in headers]
+
+        # Track column widths while adding rows so flush() never re-scans the data
+        widths = self._col_widths[sheet_name]
+        row = []
+        for col_idx, header in enumerate(headers):
+            value = self._cell_value(item.get(header, ""))
+            if value:
+                length = len(value) if isinstance(value, str) else len(str(value))
+                if length > widths[col_idx]:
+                    widths[col_idx] = length
+            row.append(value)
+
+        if self.use_xlsxwriter:
+            self._xlsx_write_row(sheet_name, row)
+        else:
+            self._rows[sheet_name].append(row)
+
+    def _xlsx_sheet(self, sheet_name: str):
+        sheet = self._xlsx_sheets.get(sheet_name)
+        if sheet is not None:
+            return sheet
+
+        if self.workbook is None:
+            self.workbook = xlsxwriter.Workbook(str(self.filename), {
+                'constant_memory': True,
+                'use_zip64': True,
+                # Store scraped text verbatim, as openpyxl does
+                'strings_to_formulas': False,
+                'strings_to_urls': False,
+            })
+            self._xlsx_header_format = self.workbook.add_format({
+                'bold': True, 'font_color': '#FFFFFF', 'font_size': 11, 'bg_color': '#366092',
+                'align': 'center', 'valign': 'vcenter', 'text_wrap': True, 'border': 1,
+            })
+            self._xlsx_row_format = self.workbook.add_format({
+                'valign': 'top', 'text_wrap': True, 'border': 1,
+            })
+
+        sheet = self.workbook.add_worksheet(sheet_name)
+        sheet.write_row(0, 0, self._headers[sheet_name], self._xlsx_header_format)
+        self._xlsx_sheets[sheet_name] = sheet
+        self._next_row[sheet_name] = 1
+        return sheet
+
+    def _xlsx_write_row(self, sheet_name: str, row: List[Any]):
+        sheet = self._xlsx_sheet(sheet_name)
+        row_num = self._next_row[sheet_name]
+        sheet.write_row(row_num, 0, row, self._xlsx_row_format)
+        self._next_row[sheet_name] = row_num + 1
+
+    def _write_sheet(self, sheet_name: str):
+        sheet = self.workbook.create_sheet(sheet_name)
+        # Column dimensions must be set before any row is appended in write-only mode
+        self._auto_adjust_column_width(sheet, self._col_widths[sheet_name])
+        sheet.append(self._header_cells(sheet, self._headers[sheet_name]))
+        for row in self._rows[sheet_name]:
+            sheet.append([self._row_cell(sheet, value) for value in row])
 
     async def store_content(self, content_item: Dict):
-        headers = list(content_item.keys())
-        if not self.contents_headers_written:
-            self._write_headers(self.contents_sheet, headers)
-            self.contents_headers_written = True
-        self._write_row(self.contents_sheet, content_item, headers)
+        self._add_row("Contents", content_item)
         content_id = content_item.get('aweme_id') or content_item.get('video_id') or 'N/A'
         utils.logger.info(f"[ExcelStoreBase] Stored content to Excel: {content_id}")
 
     async def store_comment(self, comment_item: Dict):
-        headers = list(comment_item.keys())
-        if not self.comments_headers_written:
-            self._write_headers(self.comments_sheet, headers)
-            self.comments_headers_written = True
-        self._write_row(self.comments_sheet, comment_item, headers)
+        self._add_row("Comments", comment_item)
         utils.logger.info(f"[ExcelStoreBase] Stored comment to Excel: {comment_item.get('comment_id', 'N/A')}")
 
     async def store_creator(self, creator: Dict):
-        headers = list(creator.keys())
-        if not self.creators_headers_written:
-            self._write_headers(self.creators_sheet, headers)
-            self.creators_headers_written = True
-        self._write_row(self.creators_sheet, creator, headers)
+        self._add_row("Creators", creator)
         utils.logger.info(f"[ExcelStoreBase] Stored creator to Excel: {creator.get('user_id', 'N/A')}")
 
     def flush(self):
         try:
-            self._auto_adjust_column_width(self.contents_sheet)
-            self._auto_adjust_column_width(self.comments_sheet)
-            self._auto_adjust_column_width(self.creators_sheet)
+            if self.use_xlsxwriter:
+                self._flush_xlsxwriter()
+                return
 
-            if self.contents_sheet.max_row == 1:
-                self.workbook.remove(self.contents_sheet)
-            if self.comments_sheet.max_row == 1:
-                self.workbook.remove(self.comments_sheet)
-            if self.creators_sheet.max_row == 1:
-                self.workbook.remove(self.creators_sheet)
+            # Empty sheets are never created
+            for sheet_name, rows in self._rows.items():
+                if rows:
+                    self._write_sheet(sheet_name)
 
             if len(self.workbook.sheetnames) == 0:
                 utils.logger.info(f"[ExcelStoreBase] No data to save, skipping file creation: {self.filename}")
@@ -180,3 +236,15 @@ class ExcelStoreBase(AbstractStore):
         except Exception as e:
             utils.logger.error(f"[ExcelStoreBase] Error saving Excel file: {e}")
             raise
+
+    def _flush_xlsxwriter(self):
+        if self.workbook is None:
+            utils.logger.info(f"[ExcelStoreBase] No data to save, skipping file creation: {self.filename}")
+            return
+
+        for sheet_name, sheet in self._xlsx_sheets.items():
+            for col_idx, max_length in enumerate(self._col_widths[sheet_name]):
+                sheet.set_column(col_idx, col_idx, self._adjusted_width(max_length))
+
+        self.workbook.close()
+        utils.logger.info(f"[ExcelStoreBase] Excel file saved successfully: {self.filename}")
@@ -3,64 +3,125 @@
 
 import asyncio
 import csv
+import io
 import json
 import os
 import pathlib
-from typing import Dict, List
+import textwrap
+from typing import Dict, List, Set, Tuple
 import aiofiles
 from tools.utils import utils
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _dumps(obj) -> str:
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode('utf-8')
+        except TypeError:
+            # e.g. integers beyond 64 bits; the stdlib encoder handles them
+            pass
+    return json.dumps(obj, ensure_ascii=False, indent=2)
+
+
+# Closing bytes of a JSON file written by write_single_item_to_json
+_JSON_TAIL = b"\n]"
+
 
 class AsyncFileWriter:
+    # Shared across instances: the store factory creates a new writer per item
+    _csv_headers_written: Set[str] = set()
+    # (platform, crawler_type, file_type, item_type) -> (date, path); the directory
+    # only needs creating once per day
+    _path_cache: Dict[Tuple[str, str, str, str], Tuple[str, str]] = {}
+    # One lock per output file, so different item types are written concurrently
+    _locks: Dict[str, asyncio.Lock] = {}
+
     def __init__(self, platform: str, crawler_type: str):
-        self.lock = asyncio.Lock()
         self.platform = platform
         self.crawler_type = crawler_type
 
     def _get_file_path(self, file_type: str, item_type: str) -> str:
+        key = (self.platform, self.crawler_type, file_type, item_type)
+        current_date = utils.get_current_date()
+        cached = self._path_cache.get(key)
+        if cached is not None and cached[0] == current_date:
+            return cached[1]
+
         base_path = f"data/{self.platform}/{file_type}"
         pathlib.Path(base_path).mkdir(parents=True, exist_ok=True)
-        file_name = f"{self.crawler_type}_{item_type}_{utils.get_current_date()}.{file_type}"
-        return f"{base_path}/{file_name}"
+        file_name = f"{self.crawler_type}_{item_type}_{current_date}.{file_type}"
+        file_path = f"{base_path}/{file_name}"
+        self._path_cache[key] = (current_date, file_path)
+        return file_path
+
+    def _get_lock(self, file_path: str) -> asyncio.Lock:
+        lock = self._locks.get(file_path)
+        if lock is None:
+            lock = self._locks[file_path] = asyncio.Lock()
+        return lock
 
     async def write_to_csv(self, item: Dict, item_type: str):
         file_path = self._get_file_path('csv', item_type)
-        async with self.lock:
-            file_exists = os.path.exists(file_path)
+        # aiofiles doesn't support csv.writer directly, so format into a buffer
+        # and issue a single write for header + row
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, quoting=csv.QUOTE_ALL, lineterminator='\n')
+        async with self._get_lock(file_path):
+            if file_path not in self._csv_headers_written:
+                if not os.path.exists(file_path):
+                    writer.writerow(item.keys())
+                self._csv_headers_written.add(file_path)
+            writer.writerow(item.values())
             async with aiofiles.open(file_path, 'a', newline='', encoding='utf-8-sig') as f:
-                # aiofiles doesn't support csv.DictWriter directly, use manual approach
-                if not file_exists:
-                    header_line = ','.join(f'"{k}"' for k in item.keys()) + '\n'
-                    await f.write(header_line)
-
-                values = []
-                for v in item.values():
-                    if v is None:
-                        values.append('')
-                    elif isinstance(v, str):
-                        # Escape quotes and wrap in quotes
-                        values.append(f'"{v.replace(chr(34), chr(34)+chr(34))}"')
-                    else:
-                        values.append(f'"{v}"')
-                row_line = ','.join(values) + '\n'
-                await f.write(row_line)
+                await f.write(buffer.getvalue())
 
     async def write_single_item_to_json(self, item: Dict, item_type: str):
         file_path = self._get_file_path('json', item_type)
-        async with self.lock:
+        entry = textwrap.indent(_dumps(item), '  ')
+        async with self._get_lock(file_path):
+            try:
+                is_empty = os.path.getsize(file_path) == 0
+            except FileNotFoundError:
+                is_empty = True
+
+            if is_empty:
+                async with aiofiles.open(file_path, 'w', encoding='utf-8') as f:
+                    await f.write(f"[\n{entry}\n]")
+                return
+
+            # Append in place by overwriting the closing "\n]" instead of re-reading
+            # and re-serializing the whole array on every item
+            async with aiofiles.open(file_path, 'r+b') as f:
+                await f.seek(0, os.SEEK_END)
+                if await f.tell() >= len(_JSON_TAIL):
+                    await f.seek(-len(_JSON_TAIL), os.SEEK_END)
+                    if await f.read() == _JSON_TAIL:
+                        await f.seek(-len(_JSON_TAIL), os.SEEK_END)
+                        await f.write(f",\n{entry}\n]".encode('utf-8'))
+                        return
+
+            # Not a file we laid out ("[]", trailing newline, truncated write...):
+            # recover what parses and rewrite the whole array
+            await self._rewrite_json_array(file_path, item)
+
+    async def _rewrite_json_array(self, file_path: str, item: Dict):
+        existing_data = []
+        async with aiofiles.open(file_path, 'rb') as f:
+            content = await f.read()
+        try:
+            if content.strip():
+                existing_data = json.loads(content)
+            if not isinstance(existing_data, list):
+                existing_data = [existing_data]
+        except ValueError:
             existing_data = []
-            if os.path.exists(file_path) and os.path.getsize(file_path) > 0:
-                async with aiofiles.open(file_path, 'r', encoding='utf-8') as f:
-                    try:
-                        content = await f.read()
-                        if content:
-                            existing_data = json.loads(content)
-                        if not isinstance(existing_data, list):
-                            existing_data = [existing_data]
-                    except json.JSONDecodeError:
-                        existing_data = []
-
-            existing_data.append(item)
-
-            async with aiofiles.open(file_path, 'w', encoding='utf-8') as f:
-                await f.write(json.dumps(existing_data, ensure_ascii=False, indent=4))
+
+        existing_data.append(item)
+        entries = ",\n".join(textwrap.indent(_dumps(x), '  ') for x in existing_data)
+        async with aiofiles.open(file_path, 'w', encoding='utf-8') as f:
+            await f.write(f"[\n{entries}\n]")
@@ -6,13 +6,19 @@
 """
 
 import asyncio
+import functools
+import importlib.util
 import json
 import time
 import os
+import traceback
 import sys
 import argparse
 import logging
+import math
 import random
+import shutil
+import platform
 from datetime import datetime
 from urllib.parse import quote
 from typing import Dict, List, Optional
@@ -30,30 +36,514 @@ load_dotenv(env_path / '.env')
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-# 尝试导入DrissionPage
-try:
-    from DrissionPage import ChromiumPage
-    from DrissionPage.errors import ElementNotFoundError
-    DRISSION_AVAILABLE = True
-except ImportError:
-    DRISSION_AVAILABLE = False
+# DrissionPage和BeautifulSoup体积较大，这里只检查是否安装，真正用到时再导入
+DRISSION_AVAILABLE = importlib.util.find_spec('DrissionPage') is not None
+if not DRISSION_AVAILABLE:
     logger.warning("DrissionPage未安装。请运行: pip install DrissionPage")
 
-# 尝试导入BeautifulSoup
+# 可选：orjson序列化更快（结果中大量中文评论时尤为明显），未安装时回退到标准库json
 try:
-    from bs4 import BeautifulSoup
-    BS4_AVAILABLE = True
+    import orjson
 except ImportError:
-    BS4_AVAILABLE = False
+    orjson = None
+
+BS4_AVAILABLE = importlib.util.find_spec('bs4') is not None
+if not BS4_AVAILABLE:
     logger.warning("BeautifulSoup4未安装。请运行: pip install beautifulsoup4")
 
+_DRISSION_EXPORTS = {'ChromiumPage', 'ChromiumOptions', 'ElementNotFoundError'}
+
+
+def __getattr__(name):
+    """按需导入DrissionPage的类（PEP 562），保持 douyin_tool.ChromiumPage 等属性可用"""
+    if name in _DRISSION_EXPORTS:
+        from DrissionPage import ChromiumPage, ChromiumOptions
+        from DrissionPage.errors import ElementNotFoundError
+        globals().update(ChromiumPage=ChromiumPage, ChromiumOptions=ChromiumOptions,
+                         ElementNotFoundError=ElementNotFoundError)
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+@functools.lru_cache(maxsize=1)
+def _comment_strainers():
+    """只构建评论节点的子树，跳过页面其余部分"""
+    from bs4 import SoupStrainer
+    return (
+        SoupStrainer('div', attrs={'data-e2e': 'comment-item'}),
+        SoupStrainer('div', attrs={'class': re.compile('comment-item')}),
+    )
+
+# 评论清洗用正则（模块级预编译）
+_RE_USER = re.compile(r'^@?[\u4e00-\u9fa5\w\-_□·.]+\s*\d*\s*\.{2,}\s*')
+_RE_TIME1 = re.compile(r'\s*\d+[分小时天周月年]+前\s*')
+_RE_TIME2 = re.compile(r'\s*(昨天|刚刚|今天)\s*')
+_RE_IP = re.compile(r'\s*[·•]\s*[\u4e00-\u9fa5]{2,10}\s*')
+_RE_SHARE = re.compile(r'\s*\d*\s*分享\s*')
+_RE_REPLY = re.compile(r'\s*回复\s*')
+_RE_EXPAND = re.compile(r'\s*展开\d*条回复\s*')
+_RE_COLLAPSE = re.compile(r'\s*收起回复\s*')
+_RE_MORE = re.compile(r'\s*查看更多回复\s*')
+_RE_LIKE_TAIL = re.compile(r'\s+\d+\s*$')
+_RE_LIKE_HEAD = re.compile(r'^\d+\s+')
+_RE_AUTHOR = re.compile(r'\s*作者\s*')
+_RE_WS = re.compile(r'\s+')
+# 上面各清洗规则至少需要其中一个字符才可能命中，不含这些字符的文本只需合并空白
+_RE_CLEAN_TRIGGER = re.compile(r'[.·•分回展收查作昨刚今\d]')
+
+# 反检测脚本（通过CDP在每个新文档加载前注入）
+# 基础部分：只覆盖几个navigator属性，对页面性能几乎没有影响
+_STEALTH_CORE = """
+    // 1. 隐藏webdriver属性
+    Object.defineProperty(navigator, 'webdriver', {
+        get: () => undefined
+    });
+
+    // 2. 模拟真实的languages
+    Object.defineProperty(navigator, 'languages', {
+        get: () => ['zh-CN', 'zh', 'en']
+    });
+
+    // 3. 隐藏自动化相关的属性
+    delete window.cdc_adoQpoasnfa76pfcZLmcfl_Array;
+    delete window.cdc_adoQpoasnfa76pfcZLmcfl_Promise;
+    delete window.cdc_adoQpoasnfa76pfcZLmcfl_Symbol;
+
+    // 4. 模拟真实的硬件并发数
+    Object.defineProperty(navigator, 'hardwareConcurrency', {
+        get: () => 8
+    });
+
+    // 5. 模拟真实的设备内存
+    Object.defineProperty(navigator, 'deviceMemory', {
+        get: () => 8
+    });
+
+    // 6. 隐藏自动化标记
+    Object.defineProperty(navigator, 'maxTouchPoints', {
+        get: () => 0
+    });
+"""
+
+# 完整模式额外的指纹伪装：会包装页面高频调用的原生API（permissions、WebGL等），有一定性能开销
+_STEALTH_EXTRA = """
+    // 7. 模拟真实的plugins数组
+    Object.defineProperty(navigator, 'plugins', {
+        get: () => {
+            const plugins = [
+                {name: 'Chrome PDF Plugin', filename: 'internal-pdf-viewer', description: 'Portable Document Format'},
+                {name: 'Chrome PDF Viewer', filename: 'mhjfbmdgcfjbbpaeojofohoefgiehjai', description: ''},
+                {name: 'Native Client', filename: 'internal-nacl-plugin', description: ''}
+            ];
+            plugins.length = 3;
+            return plugins;
+        }
+    });
+
+    // 8. 完整的chrome对象
+    window.chrome = {
+        runtime: {
+            connect: function() {},
+            sendMessage: function() {},
+            onMessage: { addListener: function() {} }
+        },
+        loadTimes: function() {
+            return {
+                commitLoadTime: Date.now() / 1000 - 0.5,
+                connectionInfo: 'h2',
+                finishDocumentLoadTime: Date.now() / 1000 - 0.1,
+                finishLoadTime: Date.now() / 1000,
+                firstPaintAfterLoadTime: 0,
+                firstPaintTime: Date.now() / 1000 - 0.3,
+                navigationType: 'Other',
+                npnNegotiatedProtocol: 'h2',
+                requestTime: Date.now() / 1000 - 1,
+                startLoadTime: Date.now() / 1000 - 0.8,
+                wasAlternateProtocolAvailable: false,
+                wasFetchedViaSpdy: true,
+                wasNpnNegotiated: true
+            };
+        },
+        csi: function() {
+            return {
+                onloadT: Date.now(),
+                pageT: Date.now() - performance.timing.navigationStart,
+                startE: performance.timing.navigationStart,
+                tran: 15
+            };
+        },
+        app: {
+            isInstalled: false,
+            InstallState: {INSTALLED: 'installed', NOT_INSTALLED: 'not_installed'},
+            RunningState: {RUNNING: 'running', CANNOT_RUN: 'cannot_run'}
+        }
+    };
+
+    // 9. 修改permissions API（通知权限结果只创建一次，之后复用）
+    const originalQuery = window.navigator.permissions.query;
+    let notificationsResult = null;
+    window.navigator.permissions.query = function(parameters) {
+        if (parameters && parameters.name === 'notifications') {
+            return notificationsResult || (notificationsResult = Promise.resolve({ state: Notification.permission }));
+        }
+        return originalQuery.call(this, parameters);
+    };
+
+    // 10. 修复 WebGL 指纹
+    const getParameter = WebGLRenderingContext.prototype.getParameter;
+    WebGLRenderingContext.prototype.getParameter = function(parameter) {
+        if (parameter === 37445) {
+            return 'Intel Inc.';
+        }
+        if (parameter === 37446) {
+            return 'Intel Iris OpenGL Engine';
+        }
+        return getParameter.apply(this, arguments);
+    };
+"""
+
+# 精简模式只保留开销很小的属性覆盖；完整模式包含全部伪装
+_STEALTH_SLIM_JS = "(function () {" + _STEALTH_CORE + "})();"
+_STEALTH_JS = "(function () {" + _STEALTH_CORE + _STEALTH_EXTRA + "})();"
+
+# 浏览器持久化目录（用户配置和磁盘缓存），可用 DOUYIN_BROWSER_DATA_DIR 覆盖
+DEFAULT_BROWSER_DATA_DIR = Path(__file__).parent.parent / '.douyin_browser'
+BROWSER_DISK_CACHE_SIZE = 512 * 1024 * 1024
+
+
+def _browser_data_dir() -> Path:
+    return Path(os.getenv('DOUYIN_BROWSER_DATA_DIR') or DEFAULT_BROWSER_DATA_DIR).resolve()
+
+
+# 评论区滚动脚本：一次调用内多次滚动，高度不再变化时提前结束
+_JS_SCROLL_COMMENTS = """
+async function () {
+    const container = document.querySelector('[class*="comment-list"]') || document.scrollingElement;
+    let prevHeight = -1;
+    for (let i = 0; i < 5; i++) {
+        const height = container.scrollHeight;
+        if (height === prevHeight) break;
+        prevHeight = height;
+        container.scrollTop += 800;
+        await new Promise(resolve => setTimeout(resolve, 700));
+    }
+    return container.scrollHeight;
+}
+"""
+
+# 搜索页视频提取脚本：返回每个视频链接的href、可见文本及备用的标题/作者/点赞数
+_JS_EXTRACT_VIDEOS = """
+function () {
+    const results = [];
+
+    function hasDigit(str) {
+        for (let i = 0; i < str.length; i++) {
+            const c = str.charCodeAt(i);
+            if (c >= 48 && c <= 57) return true;
+        }
+        return false;
+    }
+
+    // 同一卡片内通常有封面和标题两个链接，父元素上的作者、点赞数和文本只查一次
+    const parentInfoCache = new Map();
+    function parentInfo(parent) {
+        let info = parentInfoCache.get(parent);
+        if (info) return info;
+
+        // 获取作者信息
+        let author = '';
+        const authorElem = parent.querySelector('[class*="author"], [class*="name"], [class*="user"]');
+        if (authorElem) {
+            author = authorElem.textContent.trim();
+        }
+
+        // 获取点赞数
+        let likes = '0';
+        const likesElem = parent.querySelector('[class*="like"], [class*="count"]');
+        if (likesElem) {
+            const likesText = likesElem.textContent.trim();
+            if (hasDigit(likesText)) {
+                likes = likesText;
+            }
+        }
+
+        // text 只在需要父元素文本作标题时才计算
+        info = {author: author, likes: likes, text: null};
+        parentInfoCache.set(parent, info);
+        return info;
+    }
+
+    // 查找所有包含 /video/ 的链接
+    const links = document.querySelectorAll('a[href*="/video/"]');
+    links.forEach(function(link) {
+        const href = link.getAttribute('href');
+        if (!href) return;
+
+        // 链接的可见文本（按行依次为时长、播放量、标题、@作者时间），由Python端解析
+        const text = link.innerText || '';
+
+        // 备用标题 - 尝试多种方式
+        let title = '';
+
+        // 方式1: 查找链接内的标题元素
+        const titleElem = link.querySelector('p, span, div');
+        if (titleElem && titleElem.textContent) {
+            title = titleElem.textContent.trim();
+        }
+
+        // 方式2: 使用链接的title属性
+        if (!title && link.title) {
+            title = link.title.trim();
+        }
+
+        // 方式3: 使用链接的文本内容
+        if (!title && link.textContent) {
+            title = link.textContent.trim();
+        }
+
+        // 方式4: 查找父元素中的文本
+        const parent = link.closest('li') || link.closest('div');
+        const info = parent ? parentInfo(parent) : {author: '', likes: '0', text: null};
+        if ((!title || title.length < 5) && parent) {
+            if (info.text === null) {
+                info.text = parent.textContent || '';
+            }
+            const allText = info.text;
+            if (allText.length > 5 && allText.length < 500) {
+                title = allText.trim();
+            }
+        }
+
+        results.push({
+            href: href,
+            text: text,
+            title: title.substring(0, 200),
+            author: info.author,
+            likes: info.likes
+        });
+    });
+    return results;
+}
+"""
+
+# 视频详情页描述提取脚本
+_JS_VIDEO_DESCRIPTION = """
+const descElem = document.querySelector('[class*="desc"], [class*="title"], [class*="caption"]');
+return descElem ? descElem.textContent.trim() : '';
+"""
+
+# 评论按钮点击脚本：按顺序尝试选择器，点击第一个命中的元素并返回其选择器，未命中返回null
+_JS_CLICK_COMMENT_TRIGGER = """
+function () {
+    const selectors = [
+        'div[data-e2e="comment-icon"]',
+        'div[class*="comment"]',
+        'span[class*="comment"]',
+        'div[data-e2e="feed-comment-icon"]',
+        '[class*="comment-icon"]',
+        '[class*="CommentIcon"]',
+    ];
+    for (const s of selectors) {
+        const el = document.querySelector(s);
+        if (el) { el.click(); return s; }
+    }
+    return null;
+}
+"""
+
+# "继续看评论"点击脚本：先试登录引导的按钮选择器，再按文本查找
+_JS_CLICK_CONTINUE_COMMENTS = """
+function () {
+    const byClass = [
+        'div.related-video-card-login-guide__footer',
+        'div[class*="footer-close"]',
+        'div[class*="login-guide"] div[class*="footer"]',
+    ];
+    for (const s of byClass) {
+        const el = document.querySelector(s);
+        if (el) { el.click(); return s; }
+    }
+    for (const el of document.querySelectorAll('div, span, p')) {
+        if (el.textContent && el.textContent.includes('继续看评论')) {
+            el.click();
+            return 'text:继续看评论';
+        }
+    }
+    return null;
+}
+"""
+
+# 评论提取脚本：按优先级尝试选择器，返回前maxN条评论的文本及其span（最多20个）
+_JS_EXTRACT_COMMENTS = """
+function (maxN) {
+    const selectors = ['[data-e2e="comment-item"]', '[class*="comment-item"]', '[class*="CommentItem"]'];
+    let items = [];
+    for (const selector of selectors) {
+        items = document.querySelectorAll(selector);
+        if (items.length > 0) break;
+    }
+    return Array.from(items).slice(0, maxN).map(function (item) {
+        return {
+            text: item.innerText || '',
+            spans: Array.from(item.querySelectorAll('span')).slice(0, 20).map(function (span) {
+                return {text: span.innerText || '', class: span.getAttribute('class') || ''};
+            })
+        };
+    });
+}
+"""
+
+# 页面上用不到的视频、字体、统计和广告请求，在网络层直接拦截（不影响搜索/评论接口）
+BLOCKED_URL_PATTERNS = [
+    '*.mp4', '*.m3u8', '*.webm', '*.mp3',
+    '*.woff', '*.woff2', '*.ttf',
+    '*/monitor_browser*',
+    '*pstatp.com*.png', '*pstatp.com*.jpg',
+    '*/api/ad/*',
+]
+
+# 搜索结果接口（页面加载时由前端发起，监听后直接解析JSON）
+SEARCH_ITEM_API = 'aweme/v1/web/search/item'
+
+DOUYIN_ORIGIN = 'https://www.douyin.com'
+# 视频链接中的数字ID
+_VIDEO_URL_RE = re.compile(r'/video/(\d+)')
+
+# 直接请求搜索接口的地址模板（在抖音页面内用fetch发出，由页面自身的安全SDK附加签名参数）
+SEARCH_ITEM_URL = ('https://www.douyin.com/aweme/v1/web/search/item/?device_platform=webapp&aid=6383'
+                   '&channel=channel_pc_web&search_channel=aweme_video_web&search_source=normal_search'
+                   '&query_correct_type=1&is_filter_search=0&offset=0&count={count}&keyword={keyword}')
+
+# 页面内请求JSON接口的脚本，失败返回null
+_JS_FETCH_JSON = """
+async function (url) {
+    try {
+        const resp = await fetch(url, {credentials: 'include'});
+        if (!resp.ok) return null;
+        return await resp.json();
+    } catch (e) {
+        return null;
+    }
+}
+"""
+
+# 验证码关键词（单次扫描，忽略大小写）
+_CAPTCHA_RE = re.compile(r'验证码|验证中间页|captcha|verify|TTGCaptcha|verifycenter|滑块|人机验证', re.IGNORECASE)
+
+# 页面快照脚本：一次调用取回标题、地址、正文前5000字符和验证码iframe标记
+_JS_PAGE_SNAPSHOT = """
+return {
+    title: document.title,
+    url: location.href,
+    text: document.body ? document.body.innerText.slice(0, 5000) : '',
+    iframe: !!document.querySelector('iframe[src*="verify"]'),
+};
+"""
+
+# 网络状态探测脚本：资源请求数在一段时间内不再增长视为网络空闲
+_JS_NETWORK_STATE = """
+performance.setResourceTimingBufferSize(10000);
+return {
+    origin: performance.timeOrigin,
+    ready: document.readyState,
+    count: performance.getEntriesByType('resource').length,
+};
+"""
+
+
+def _normalize_href(href: str) -> str:
+    """把页面中的协议相对（//...）和站内相对（/...）链接补全为完整URL"""
+    if href[:2] == '//':
+        return 'https:' + href
+    if href[:1] == '/':
+        return DOUYIN_ORIGIN + href
+    return href
+
+
+def _human_delay(median: float, lo: float, hi: float) -> float:
+    """模拟真人的随机等待时长（秒）：对数正态分布，截断到 [lo, hi]"""
+    return max(lo, min(hi, random.lognormvariate(math.log(median), 0.35)))
+
+
+def _print_json(obj):
+    """以UTF-8 JSON输出结果，格式与 json.dumps(ensure_ascii=False, indent=2) 一致；orjson可用时直接写字节"""
+    if orjson is not None:
+        try:
+            data = orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            # 例如超出64位的整数，交给标准库处理
+            data = None
+        if data is not None:
+            sys.stdout.flush()
+            sys.stdout.buffer.write(data + b"\n")
+            sys.stdout.buffer.flush()
+            return
+    print(json.dumps(obj, ensure_ascii=False, indent=2))
+
+
+def _json_bytes(obj) -> bytes:
+    """紧凑格式的UTF-8 JSON字节"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            pass
+    return json.dumps(obj, ensure_ascii=False).encode('utf-8')
+
+
+def _stream_json(obj: Dict):
+    """逐项写出顶层字典（列表按元素逐个写出），不在内存中生成整个JSON字符串"""
+    sys.stdout.flush()
+    out = sys.stdout.buffer
+    out.write(b'{')
+    for i, (key, value) in enumerate(obj.items()):
+        out.write(b',\n' if i else b'\n')
+        out.write(_json_bytes(key) + b': ')
+        if isinstance(value, list):
+            out.write(b'[')
+            for j, item in enumerate(value):
+                out.write(b',\n' if j else b'\n')
+                out.write(_json_bytes(item))
+            out.write(b'\n]')
+        else:
+            out.write(_json_bytes(value))
+    out.write(b'\n}\n')
+    out.flush()
+
 
 class DouyinApi:
-    """抖音API封装类"""
+    """
+    抖音API封装类
 
-    def __init__(self):
+    默认每次搜索结束后关闭浏览器。需要连续搜索多个关键词时，使用异步上下文管理器
+    复用同一个已预热的浏览器，避免每次搜索重复启动Chromium：
+
+        async with DouyinApi() as api:
+            for kw in keywords:
+                await api.search_videos(kw)
+    """
+
+    def __init__(self, keep_alive: bool = False, slim_stealth: Optional[bool] = None):
         self.page = None
         self.is_browser_open = False
+        self._stealth_script_id = None
+        # True时搜索结束后保留浏览器，由调用方（或 __aexit__）负责关闭
+        self.keep_alive = keep_alive
+        # 空闲的评论标签页（已注册反检测脚本和资源拦截），在视频之间及多次搜索之间复用
+        self._tab_pool: List = []
+        self._tab_pool_size = 3
+        # True时只注入基础反检测脚本，不包装permissions/WebGL等页面高频调用的API
+        if slim_stealth is None:
+            slim_stealth = os.getenv('DOUYIN_SLIM_STEALTH', 'false').lower() == 'true'
+        self.slim_stealth = slim_stealth
+
+    async def __aenter__(self):
+        self.keep_alive = True
+        await self.init_browser()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.close_browser()
 
     def _parse_video_title(self, raw_text: str) -> Dict:
         """
@@ -178,7 +668,7 @@ class DouyinApi:
 
         return result
 
-    def init_browser(self):
+    async def init_browser(self):
         """初始化浏览器（增强反检测能力）"""
         if not DRISSION_AVAILABLE:
             raise ImportError("DrissionPage未安装，无法使用浏览器功能")
@@ -188,7 +678,7 @@ class DouyinApi:
 
             try:
                 # 配置浏览器选项
-                from DrissionPage import ChromiumOptions
+                from DrissionPage import ChromiumOptions, ChromiumPage
                 options = ChromiumOptions()
 
                 # 根据环境变量决定是否使用无头模式
@@ -212,8 +702,15 @@ class DouyinApi:
                 # Docker/Linux必需参数
                 options.set_argument('--no-sandbox')
                 options.set_argument('--disable-dev-shm-usage')
-                options.set_argument('--disable-gpu')
-                options.set_argument('--disable-software-rasterizer')
+
+                # 图形渲染：不再禁用GPU。无GPU设备的Linux（如Docker）用ANGLE+SwiftShader软件渲染，
+                # 比完全关闭GPU的CPU绘制路径快，且页面能拿到正常的WebGL实现
+                if platform.system() == 'Linux' and not os.path.exists('/dev/dri'):
+                    options.set_argument('--use-gl', 'angle')
+                    options.set_argument('--use-angle', 'swiftshader')
+                    options.set_argument('--enable-unsafe-swiftshader')
+                else:
+                    options.set_argument('--enable-gpu-rasterization')
 
                 # 🔥 窗口大小（使用常见分辨率）
                 options.set_argument('--window-size=1920,1080')
@@ -245,140 +742,95 @@ class DouyinApi:
                 options.set_argument('--ignore-ssl-errors')
                 options.set_argument('--allow-running-insecure-content')
 
+                # 持久化用户目录和磁盘缓存：JS/CSS等静态资源在会话内和多次运行间复用
+                browser_data_dir = _browser_data_dir()
+                options.set_user_data_path(str(browser_data_dir / 'profile'))
+                options.set_argument('--disk-cache-dir', str(browser_data_dir / 'cache'))
+                options.set_argument('--disk-cache-size', str(BROWSER_DISK_CACHE_SIZE))
+
                 # 🔥 更真实的User-Agent
                 options.set_user_agent('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
 
                 logger.info("创建ChromiumPage实例...")
                 self.page = ChromiumPage(addr_or_opts=options)
                 self.is_browser_open = True
+                # get() 发出请求后立即返回，不等待视频、统计脚本等全部资源加载完成
+                self.page.set.load_mode.none()
 
-                # 🔥 注入反检测脚本（隐藏webdriver特征）
-                logger.info("注入反检测脚本...")
-                try:
-                    # 完整的反检测脚本 - 一次性注入
-                    stealth_js = """
-                    // 1. 隐藏webdriver属性
-                    Object.defineProperty(navigator, 'webdriver', {
-                        get: () => undefined
-                    });
-
-                    // 2. 模拟真实的plugins数组
-                    Object.defineProperty(navigator, 'plugins', {
-                        get: () => {
-                            const plugins = [
-                                {name: 'Chrome PDF Plugin', filename: 'internal-pdf-viewer', description: 'Portable Document Format'},
-                                {name: 'Chrome PDF Viewer', filename: 'mhjfbmdgcfjbbpaeojofohoefgiehjai', description: ''},
-                                {name: 'Native Client', filename: 'internal-nacl-plugin', description: ''}
-                            ];
-                            plugins.length = 3;
-                            return plugins;
-                        }
-                    });
-
-                    // 3. 模拟真实的languages
-                    Object.defineProperty(navigator, 'languages', {
-                        get: () => ['zh-CN', 'zh', 'en']
-                    });
-
-                    // 4. 完整的chrome对象
-                    window.chrome = {
-                        runtime: {
-                            connect: function() {},
-                            sendMessage: function() {},
-                            onMessage: { addListener: function() {} }
-                        },
-                        loadTimes: function() {
-                            return {
-                                commitLoadTime: Date.now() / 1000 - 0.5,
-                                connectionInfo: 'h2',
-                                finishDocumentLoadTime: Date.now() / 1000 - 0.1,
-                                finishLoadTime: Date.now() / 1000,
-                                firstPaintAfterLoadTime: 0,
-                                firstPaintTime: Date.now() / 1000 - 0.3,
-                                navigationType: 'Other',
-                                npnNegotiatedProtocol: 'h2',
-                                requestTime: Date.now() / 1000 - 1,
-                                startLoadTime: Date.now() / 1000 - 0.8,
-                                wasAlternateProtocolAvailable: false,
-                                wasFetchedViaSpdy: true,
-                                wasNpnNegotiated: true
-                            };
-                        },
-                        csi: function() {
-                            return {
-                                onloadT: Date.now(),
-                                pageT: Date.now() - performance.timing.navigationStart,
-                                startE: performance.timing.navigationStart,
-                                tran: 15
-                            };
-                        },
-                        app: {
-                            isInstalled: false,
-                            InstallState: {INSTALLED: 'installed', NOT_INSTALLED: 'not_installed'},
-                            RunningState: {RUNNING: 'running', CANNOT_RUN: 'cannot_run'}
-                        }
-                    };
-
-                    // 5. 隐藏自动化相关的属性
-                    delete window.cdc_adoQpoasnfa76pfcZLmcfl_Array;
-                    delete window.cdc_adoQpoasnfa76pfcZLmcfl_Promise;
-                    delete window.cdc_adoQpoasnfa76pfcZLmcfl_Symbol;
-
-                    // 6. 修改permissions API
-                    const originalQuery = window.navigator.permissions.query;
-                    window.navigator.permissions.query = (parameters) => (
-                        parameters.name === 'notifications' ?
-                        Promise.resolve({ state: Notification.permission }) :
-                        originalQuery(parameters)
-                    );
-
-                    // 7. 模拟真实的硬件并发数
-                    Object.defineProperty(navigator, 'hardwareConcurrency', {
-                        get: () => 8
-                    });
-
-                    // 8. 模拟真实的设备内存
-                    Object.defineProperty(navigator, 'deviceMemory', {
-                        get: () => 8
-                    });
-
-                    // 9. 隐藏自动化标记
-                    Object.defineProperty(navigator, 'maxTouchPoints', {
-                        get: () => 0
-                    });
-
-                    // 10. 修复 WebGL 指纹
-                    const getParameter = WebGLRenderingContext.prototype.getParameter;
-                    WebGLRenderingContext.prototype.getParameter = function(parameter) {
-                        if (parameter === 37445) {
-                            return 'Intel Inc.';
-                        }
-                        if (parameter === 37446) {
-                            return 'Intel Iris OpenGL Engine';
-                        }
-                        return getParameter.apply(this, arguments);
-                    };
+                # 🔥 注册反检测脚本：由浏览器在每个新文档的页面脚本之前执行
+                logger.info("注册反检测脚本...")
+                self._stealth_script_id = self._install_stealth(self.page)
+                logger.info("反检测脚本注册成功")
+                self._block_heavy_resources(self.page)
 
-                    console.log('Anti-detection script injected successfully');
-                    """
-                    self.page.run_js(stealth_js)
-                    logger.info("反检测脚本注入成功")
-                except Exception as js_error:
-                    logger.warning(f"反检测脚本注入失败（可忽略）: {js_error}")
-
-                logger.info("等待浏览器稳定...")
-                time.sleep(3)
+                logger.info("等待浏览器就绪...")
+                await self._wait_browser_ready()
 
                 logger.info("浏览器初始化完成（反检测模式）")
 
             except Exception as init_error:
                 logger.error(f"浏览器初始化失败: {type(init_error).__name__}: {str(init_error)}")
-                import traceback
                 logger.error(f"详细错误:\n{traceback.format_exc()}")
                 raise
 
         return self.page
     
+    async def _wait_browser_ready(self, timeout: float = 5.0):
+        """轮询直到浏览器能执行JS，最多等待timeout秒，期间不阻塞事件循环"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                if self.page.run_js('return 1') == 1:
+                    return
+            except Exception:
+                pass
+            await asyncio.sleep(0.1)
+        logger.warning(f"浏览器在 {timeout} 秒内未就绪，继续执行")
+
+    async def _wait_network_idle(self, page, since: Optional[float] = None,
+                                 quiet_ms: int = 500, timeout: float = 8.0) -> bool:
+        """
+        等待页面网络空闲：文档已解析且资源请求数在quiet_ms毫秒内不再增长即返回True，
+        超过timeout秒返回False。since为导航前的时间戳（毫秒），早于它的旧文档不计入
+        """
+        deadline = time.monotonic() + timeout
+        last_count = None
+        stable_since = time.monotonic()
+        while time.monotonic() < deadline:
+            try:
+                state = page.run_js(_JS_NETWORK_STATE)
+            except Exception:
+                state = None
+            now = time.monotonic()
+            if (not state or state.get('ready') == 'loading'
+                    or (since is not None and (state.get('origin') or 0) < since)):
+                last_count = None
+            elif state.get('count') != last_count:
+                last_count = state.get('count')
+                stable_since = now
+            elif (now - stable_since) * 1000 >= quiet_ms:
+                return True
+            await asyncio.sleep(0.1)
+        return False
+
+    def _install_stealth(self, page) -> Optional[str]:
+        """通过CDP注册反检测脚本，此后该标签页的每个新文档在页面脚本之前执行它"""
+        try:
+            source = _STEALTH_SLIM_JS if self.slim_stealth else _STEALTH_JS
+            result = page.run_cdp('Page.addScriptToEvaluateOnNewDocument', source=source)
+            return result.get('identifier')
+        except Exception as js_error:
+            logger.warning(f"反检测脚本注册失败（可忽略）: {js_error}")
+            return None
+
+    def _block_heavy_resources(self, page):
+        """通过CDP拦截BLOCKED_URL_PATTERNS中的请求（按标签页生效）"""
+        try:
+            page.run_cdp('Network.enable')
+            page.run_cdp('Network.setBlockedURLs', urls=BLOCKED_URL_PATTERNS)
+        except Exception as e:
+            logger.warning(f"资源拦截设置失败（可忽略）: {e}")
+
     def close_browser(self):
         """关闭浏览器"""
         if self.page and self.is_browser_open:
@@ -390,58 +842,55 @@ class DouyinApi:
             finally:
                 self.page = None
                 self.is_browser_open = False
+                self._stealth_script_id = None
+                self._tab_pool.clear()
     
-    def _check_for_captcha(self, page) -> bool:
-        """检测页面是否出现验证码"""
+    def _release_browser(self):
+        """一次搜索结束后的清理：keep_alive 模式下保留浏览器供下次搜索复用"""
+        if self.keep_alive:
+            return
+        logger.info("清理: 关闭浏览器")
+        self.close_browser()
+
+    def _snapshot(self, page) -> Dict:
+        """一次CDP调用获取页面快照 {title, url, text, iframe}，避免分别读取 page.title / page.html"""
         try:
-            page_title = page.title or ""
-            page_html = page.html[:5000] if page.html else ""  # 只取前5000字符检测
-
-            # 验证码关键词列表
-            captcha_indicators = [
-                "验证码", "验证中间页", "captcha", "verify",
-                "TTGCaptcha", "verifycenter", "滑块", "人机验证"
-            ]
+            return page.run_js(_JS_PAGE_SNAPSHOT) or {}
+        except Exception as e:
+            logger.warning(f"获取页面快照失败: {e}")
+            return {}
 
-            for indicator in captcha_indicators:
-                if indicator.lower() in page_title.lower() or indicator.lower() in page_html.lower():
-                    logger.warning(f"⚠️ 检测到验证码特征: {indicator}")
-                    return True
+    def _check_for_captcha(self, snap: Dict) -> bool:
+        """根据页面快照检测是否出现验证码"""
+        try:
+            match = _CAPTCHA_RE.search(snap.get('title') or '') or _CAPTCHA_RE.search(snap.get('text') or '')
+            if match:
+                logger.warning(f"⚠️ 检测到验证码特征: {match.group(0)}")
+                return True
 
             # 检查是否有验证码iframe
-            try:
-                captcha_iframe = page.ele('css:iframe[src*="verify"]', timeout=1)
-                if captcha_iframe:
-                    logger.warning("⚠️ 检测到验证码iframe")
-                    return True
-            except:
-                pass
+            if snap.get('iframe'):
+                logger.warning("⚠️ 检测到验证码iframe")
+                return True
 
             return False
         except Exception as e:
             logger.warning(f"验证码检测异常: {e}")
             return False
 
-    def _inject_stealth_on_page(self, page):
-        """在页面加载后再次注入反检测脚本"""
-        try:
-            stealth_js = """
-            Object.defineProperty(navigator, 'webdriver', { get: () => undefined });
-            if (!window.chrome) {
-                window.chrome = { runtime: {}, app: {}, csi: function(){}, loadTimes: function(){} };
-            }
-            """
-            page.run_js(stealth_js)
-        except:
-            pass
-
     async def _enter_video_detail(self, page, video_url: str) -> bool:
         """进入视频详情页"""
         try:
             logger.info(f"进入视频详情页: {video_url}")
-            page.get(video_url)
-            await asyncio.sleep(random.uniform(3, 5))
-            self._inject_stealth_on_page(page)
+            # 评论接口返回即说明详情页可用，无需等待整页加载
+            page.listen.start('aweme/v1/web/comment/list')
+            # 导航在线程中执行，多个标签页并发抓取时不阻塞事件循环
+            await asyncio.to_thread(page.get, video_url)
+            packet = await asyncio.to_thread(page.listen.wait, timeout=8)
+            page.listen.stop()
+            page.stop_loading()
+            if not packet:
+                await self._wait_network_idle(page, timeout=5)
 
             # 检查是否成功加载
             page_title = page.title or ""
@@ -449,7 +898,7 @@ class DouyinApi:
                 logger.warning("视频详情页触发验证码")
                 return False
 
-            logger.info(f"视频详情页加载成功，标题: {page_title}")
+            logger.info("视频详情页加载成功，标题: %s", page_title)
             return True
         except Exception as e:
             logger.error(f"进入视频详情页失败: {e}")
@@ -460,35 +909,15 @@ class DouyinApi:
         try:
             logger.info("尝试触发评论加载...")
 
-            # 方法1: 点击评论图标/数字（右侧的评论按钮）
-            comment_selectors = [
-                'css:div[data-e2e="comment-icon"]',
-                'css:div[class*="comment"]',
-                'css:span[class*="comment"]',
-                'css:div[data-e2e="feed-comment-icon"]',
-            ]
-
-            for selector in comment_selectors:
-                try:
-                    elem = page.ele(selector, timeout=2)
-                    if elem:
-                        logger.info(f"找到评论元素: {selector}")
-                        elem.click()
-                        await asyncio.sleep(2)
-                        return True
-                except:
-                    continue
-
-            # 方法2: 使用JavaScript点击评论区域
+            # 所有选择器在页面内一次性尝试，只需一次CDP往返
             try:
-                page.run_js("""
-                    const commentBtn = document.querySelector('[data-e2e="comment-icon"]')
-                        || document.querySelector('[class*="comment-icon"]')
-                        || document.querySelector('[class*="CommentIcon"]');
-                    if (commentBtn) commentBtn.click();
-                """)
-                await asyncio.sleep(2)
-                return True
+                # 点击前短暂停顿，模拟真人操作延迟
+                await asyncio.sleep(_human_delay(0.3, 0.2, 0.6))
+                matched = page.run_js(_JS_CLICK_COMMENT_TRIGGER)
+                if matched:
+                    logger.info("找到评论元素: %s", matched)
+                    await self._wait_network_idle(page, timeout=2)
+                    return True
             except:
                 pass
 
@@ -504,51 +933,13 @@ class DouyinApi:
         try:
             logger.info("尝试点击'继续看评论'...")
 
-            # 从截图看到的选择器
-            continue_selectors = [
-                'css:div.related-video-card-login-guide__footer',
-                'css:div[class*="footer-close"]',
-                'css:div:contains("继续看评论")',
-                'xpath://div[contains(text(), "继续看评论")]',
-                'css:div[class*="login-guide"] div[class*="footer"]',
-            ]
-
-            for selector in continue_selectors:
-                try:
-                    elem = page.ele(selector, timeout=2)
-                    if elem:
-                        text = elem.text or ""
-                        if "继续" in text or "评论" in text or elem:
-                            logger.info(f"找到继续看评论元素: {selector}")
-                            elem.click()
-                            await asyncio.sleep(2)
-                            return True
-                except:
-                    continue
-
-            # 使用JavaScript查找并点击
             try:
-                result = page.run_js("""
-                    // 查找包含"继续看评论"的元素
-                    const elements = document.querySelectorAll('div, span, p');
-                    for (let elem of elements) {
-                        if (elem.textContent && elem.textContent.includes('继续看评论')) {
-                            elem.click();
-                            return true;
-                        }
-                    }
-                    // 查找登录引导的关闭/继续按钮
-                    const footerClose = document.querySelector('[class*="footer-close"]')
-                        || document.querySelector('[class*="login-guide"] [class*="footer"]');
-                    if (footerClose) {
-                        footerClose.click();
-                        return true;
-                    }
-                    return false;
-                """)
-                if result:
-                    logger.info("通过JS点击了继续看评论")
-                    await asyncio.sleep(2)
+                # 点击前短暂停顿，模拟真人操作延迟
+                await asyncio.sleep(_human_delay(0.3, 0.2, 0.6))
+                matched = page.run_js(_JS_CLICK_CONTINUE_COMMENTS)
+                if matched:
+                    logger.info("找到继续看评论元素: %s", matched)
+                    await self._wait_network_idle(page, timeout=2)
                     return True
             except:
                 pass
@@ -567,90 +958,68 @@ class DouyinApi:
 
         text = raw_text.strip()
 
+        # 快速路径：过短的文本调用方会直接丢弃；不含触发字符的文本无需逐条正则替换
+        if len(text) < 4:
+            return text
+        if not _RE_CLEAN_TRIGGER.search(text):
+            return _RE_WS.sub(' ', text)
+
         # 1. 移除开头的用户名 (格式: @用户名 数字... 或 用户名 数字...)
         # 匹配: "@xxx 6 ..." 或 "xxx 数字 ..."
-        text = re.sub(r'^@?[\u4e00-\u9fa5\w\-_□·.]+\s*\d*\s*\.{2,}\s*', '', text)
+        text = _RE_USER.sub('', text)
 
         # 2. 移除时间信息 (X分钟前, X小时前, X天前, X周前, X月前, X年前, 昨天, 刚刚)
-        text = re.sub(r'\s*\d+[分小时天周月年]+前\s*', ' ', text)
-        text = re.sub(r'\s*(昨天|刚刚|今天)\s*', ' ', text)
+        text = _RE_TIME1.sub(' ', text)
+        text = _RE_TIME2.sub(' ', text)
 
         # 3. 移除IP/地区信息 (·省份/城市)
-        text = re.sub(r'\s*[·•]\s*[\u4e00-\u9fa5]{2,10}\s*', ' ', text)
+        text = _RE_IP.sub(' ', text)
 
         # 4. 移除操作按钮文本
-        text = re.sub(r'\s*\d*\s*分享\s*', ' ', text)
-        text = re.sub(r'\s*回复\s*', ' ', text)
-        text = re.sub(r'\s*展开\d*条回复\s*', ' ', text)
-        text = re.sub(r'\s*收起回复\s*', ' ', text)
-        text = re.sub(r'\s*查看更多回复\s*', ' ', text)
+        text = _RE_SHARE.sub(' ', text)
+        text = _RE_REPLY.sub(' ', text)
+        text = _RE_EXPAND.sub(' ', text)
+        text = _RE_COLLAPSE.sub(' ', text)
+        text = _RE_MORE.sub(' ', text)
 
         # 5. 移除点赞数 (单独的数字)
-        text = re.sub(r'\s+\d+\s*$', '', text)
-        text = re.sub(r'^\d+\s+', '', text)
+        text = _RE_LIKE_TAIL.sub('', text)
+        text = _RE_LIKE_HEAD.sub('', text)
 
         # 6. 移除"作者"标识
-        text = re.sub(r'\s*作者\s*', ' ', text)
+        text = _RE_AUTHOR.sub(' ', text)
 
         # 7. 清理多余空白
-        text = re.sub(r'\s+', ' ', text).strip()
+        text = _RE_WS.sub(' ', text).strip()
 
         return text
 
     async def _extract_comments(self, page, max_comments: int = 50) -> List[Dict]:
-        """提取评论数据（改进版本 - 使用DrissionPage原生方法）"""
+        """提取评论数据（单次JS调用取回全部评论）"""
         comments = []
+        now_iso = datetime.now().isoformat()  # 同一批次共用采集时间
 
         try:
             logger.info("开始提取评论...")
 
-            # 滚动评论区加载更多
-            for scroll_i in range(3):
-                try:
-                    page.scroll.down(300)
-                    await asyncio.sleep(1)
-                except:
-                    pass
-
-            # 使用DrissionPage原生方法查找评论
-            comment_items = []
-            selectors = [
-                'css:[data-e2e="comment-item"]',
-                'css:[class*="comment-item"]',
-                'css:[class*="CommentItem"]'
-            ]
+            # 滚动评论区加载更多（浏览器端循环，内容不再增长时提前结束）
+            try:
+                await asyncio.to_thread(page.run_js, _JS_SCROLL_COMMENTS)
+            except:
+                pass
 
-            for selector in selectors:
-                try:
-                    items = page.eles(selector, timeout=2)
-                    if items and len(items) > 0:
-                        comment_items = items
-                        break
-                except:
-                    continue
+            # 一次JS调用取回评论文本和span信息，并在浏览器端截取前max_comments条
+            comment_items = page.run_js(_JS_EXTRACT_COMMENTS, max_comments) or []
 
             if not comment_items:
                 logger.warning("未找到评论元素")
                 return []
 
             # 解析每个评论
-            for item in comment_items[:max_comments]:
+            for item in comment_items:
                 try:
-                    # 获取整个评论的文本
-                    full_text = item.text or ''
-
-                    # 获取所有span子元素
-                    spans = item.eles('tag:span', timeout=0.5)
-                    span_data_list = []
-
-                    for span in spans[:20]:  # 最多处理20个span
-                        try:
-                            span_data_list.append({
-                                'text': span.text or '',
-                                'class': span.attr('class') or ''
-                            })
-                        except:
-                            continue
+                    full_text = item.get('text') or ''
+                    span_data_list = item.get('spans') or []
 
                     # 使用清洗函数解析
                     parsed = self._parse_comment_text(full_text, span_data_list)
@@ -660,32 +1029,37 @@ class DouyinApi:
                             'text': parsed['text'],
                             'username': parsed['username'],
                             'likes': parsed['likes'],
-                            'collected_at': datetime.now().isoformat()
+                            'collected_at': now_iso
                         }
 
                         comments.append(comment_data)
 
                 except Exception as e:
-                    logger.debug(f"解析评论失败: {e}")
+                    logger.debug("解析评论失败: %s", e)
                     continue
 
-            logger.info(f"共提取到 {len(comments)} 条评论")
+            logger.info("共提取到 %d 条评论", len(comments))
             return comments
 
         except Exception as e:
             logger.error(f"提取评论失败: {e}")
-            import traceback
             logger.error(traceback.format_exc())
 
-        # 备用方法：使用原来的备用提取
+        # 备用方法：一次性取出页面HTML，用lxml只解析评论节点
         try:
-            comment_elements = page.eles('css:div[data-e2e="comment-item"]', timeout=3)
-            if not comment_elements:
-                comment_elements = page.eles('css:div[class*="comment-item"]', timeout=2)
+            comment_elements = []
+            if BS4_AVAILABLE:
+                from bs4 import BeautifulSoup
+                html = page.html or ''
+                for strainer in _comment_strainers():
+                    soup = BeautifulSoup(html, 'lxml', parse_only=strainer)
+                    comment_elements = soup.find_all('div', recursive=False)
+                    if comment_elements:
+                        break
 
             for elem in comment_elements[:max_comments]:
                 try:
-                    raw_text = elem.text
+                    raw_text = elem.get_text('\n', strip=True)
                     if raw_text:
                         # 使用原来的清洗方法
                         cleaned_text = self._clean_comment_text(raw_text[:500])
@@ -694,7 +1068,7 @@ class DouyinApi:
                                 'text': cleaned_text,
                                 'username': 'unknown',
                                 'likes': '0',
-                                'collected_at': datetime.now().isoformat()
+                                'collected_at': now_iso
                             })
                 except:
                     continue
@@ -704,7 +1078,7 @@ class DouyinApi:
 
         return comments
 
-    async def _get_video_with_comments(self, page, video_info: Dict) -> Dict:
+    async def _get_video_with_comments(self, page, video_info: Dict, max_comments: int = 50) -> Dict:
         """获取单个视频的详情和评论"""
         video_url = video_info.get('video_url', '')
         if not video_url:
@@ -718,11 +1092,7 @@ class DouyinApi:
 
             # 2. 获取视频描述（如果有）
             try:
-                desc_js = """
-                    const descElem = document.querySelector('[class*="desc"], [class*="title"], [class*="caption"]');
-                    return descElem ? descElem.textContent.trim() : '';
-                """
-                description = page.run_js(desc_js)
+                description = page.run_js(_JS_VIDEO_DESCRIPTION)
                 if description:
                     video_info['description'] = description[:500]
             except:
@@ -735,14 +1105,15 @@ class DouyinApi:
             await self._click_continue_comments(page)
 
             # 5. 等待评论加载
-            await asyncio.sleep(2)
+            await self._wait_network_idle(page, timeout=2)
 
             # 6. 提取评论
-            comments = await self._extract_comments(page)
+            comments = await self._extract_comments(page, max_comments)
             video_info['comments'] = comments
             video_info['comment_count'] = len(comments)
 
-            logger.info(f"视频 [{video_info.get('title', '')[:30]}] 获取到 {len(comments)} 条评论")
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("视频 [%s] 获取到 %d 条评论", (video_info.get('title') or '')[:30], len(comments))
 
         except Exception as e:
             logger.error(f"获取视频评论失败: {e}")
@@ -756,6 +1127,13 @@ class DouyinApi:
         videos = []
         max_retries = 2  # 最大重试次数
 
+        # 复用的浏览器已在抖音页面上时，直接请求搜索接口，无需再次导航
+        if self.is_browser_open:
+            videos = await self._search_via_api(self.page, keyword, set())
+            if videos:
+                self._release_browser()
+                return videos
+
         for retry in range(max_retries + 1):
             try:
                 if retry > 0:
@@ -764,16 +1142,16 @@ class DouyinApi:
 
                 # 初始化浏览器
                 logger.info("步骤1: 初始化浏览器")
-                page = self.init_browser()
+                page = await self.init_browser()
                 logger.info("步骤1完成: 浏览器初始化成功")
 
                 # 🔥 先访问抖音首页，模拟正常用户行为
                 if retry == 0:
                     logger.info("步骤1.5: 先访问首页建立会话...")
                     try:
+                        nav_start = time.time() * 1000
                         page.get("https://www.douyin.com/")
-                        await asyncio.sleep(random.uniform(2, 4))
-                        self._inject_stealth_on_page(page)
+                        await self._wait_network_idle(page, since=nav_start, timeout=4)
                     except:
                         pass
 
@@ -784,30 +1162,25 @@ class DouyinApi:
                 # 访问页面
                 try:
                     logger.info("开始加载页面...")
+                    page.listen.start(SEARCH_ITEM_API)
+                    nav_start = time.time() * 1000
                     page.get(search_url)
                     logger.info("页面加载完成")
-
-                    # 页面加载后再次注入反检测脚本
-                    self._inject_stealth_on_page(page)
                 except Exception as page_error:
                     logger.error(f"页面加载失败: {type(page_error).__name__}: {str(page_error)}")
                     raise Exception(f"无法访问抖音搜索页面: {str(page_error)}")
 
-                # 🔥 等待页面渲染（随机时间，更像人类）
-                wait_time = random.uniform(5, 8)
-                logger.info(f"等待页面渲染（{wait_time:.1f}秒）...")
-                await asyncio.sleep(wait_time)
+                # 🔥 等待页面渲染（网络空闲即继续，最多8秒）
+                logger.info("等待页面渲染...")
+                await self._wait_network_idle(page, since=nav_start, timeout=8)
 
-                # 🔥 检查页面标题和验证码
-                try:
-                    page_title = page.title
-                    logger.info(f"页面标题: {page_title}")
-                except Exception as title_err:
-                    logger.warning(f"获取标题失败: {title_err}")
-                    page_title = ""
+                # 🔥 检查页面标题和验证码（同一份快照）
+                snap = self._snapshot(page)
+                page_title = snap.get('title') or ""
+                logger.info(f"页面标题: {page_title}, 地址: {snap.get('url', '')}")
 
                 # 🔥 验证码检测
-                if self._check_for_captcha(page):
+                if self._check_for_captcha(snap):
                     logger.error("❌ 检测到验证码页面！")
                     if retry < max_retries:
                         logger.info("尝试关闭浏览器并重新初始化...")
@@ -823,7 +1196,8 @@ class DouyinApi:
                 # 🔥 直接提取数据
                 logger.info("步骤3: 提取视频数据")
                 seen_urls = set()
-                videos = self._extract_video_data_direct(page, seen_urls)
+                videos = (self._extract_video_data_from_listener(page, seen_urls)
+                          or self._extract_video_data_direct(page, seen_urls))
                 logger.info(f"步骤3完成: 共采集到 {len(videos)} 条视频数据")
 
                 # 如果没有结果且未达到最大重试次数，重试
@@ -836,7 +1210,6 @@ class DouyinApi:
 
             except Exception as e:
                 logger.error(f"搜索视频失败: {type(e).__name__}: {str(e)}")
-                import traceback
                 logger.error(f"详细错误:\n{traceback.format_exc()}")
                 if retry >= max_retries:
                     raise
@@ -844,14 +1217,62 @@ class DouyinApi:
                     self.close_browser()
                     continue
             finally:
-                # 确保浏览器关闭
+                # 确保浏览器关闭（keep_alive 模式下保留）
                 if retry >= max_retries or len(videos) > 0:
-                    logger.info("清理: 关闭浏览器")
-                    self.close_browser()
+                    self._release_browser()
 
         return videos
 
-    async def search_videos_with_comments(self, keyword: str, max_videos: int = 10, max_comments_per_video: int = 30) -> List[Dict]:
+    def _acquire_tab(self, page):
+        """从标签页池取一个空闲标签页，池为空时新建并完成反检测和资源拦截设置"""
+        if self._tab_pool:
+            return self._tab_pool.pop()
+        tab = page.new_tab()
+        tab.set.load_mode.none()
+        self._install_stealth(tab)
+        self._block_heavy_resources(tab)
+        return tab
+
+    def _release_tab(self, tab, healthy: bool = True):
+        """归还标签页：正常且池未满时放回池中（先切到空白页停止旧页面脚本），否则关闭"""
+        if healthy and len(self._tab_pool) < self._tab_pool_size:
+            try:
+                tab.get('about:blank')
+                self._tab_pool.append(tab)
+                return
+            except:
+                pass
+        try:
+            tab.close()
+        except:
+            pass
+
+    async def _get_video_with_comments_in_tab(self, page, video: Dict, idx: int, total: int,
+                                              semaphore: asyncio.BoundedSemaphore, max_comments: int) -> Dict:
+        """在独立标签页中获取单个视频的评论，由信号量限制并发标签页数量"""
+        async with semaphore:
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("处理视频 %d/%d: %s...", idx + 1, total, (video.get('title') or '')[:40])
+            tab = None
+            healthy = False
+            try:
+                tab = self._acquire_tab(page)
+                result = await self._get_video_with_comments(tab, video.copy(), max_comments)
+                healthy = True
+                return result
+            except Exception as e:
+                logger.error(f"处理视频失败: {e}")
+                video['comments'] = []
+                video['comment_count'] = 0
+                return video
+            finally:
+                if tab is not None:
+                    self._release_tab(tab, healthy)
+                # 随机延迟后释放名额，避免请求过于集中被检测
+                await asyncio.sleep(_human_delay(1.5, 1, 3))
+
+    async def search_videos_with_comments(self, keyword: str, max_videos: int = 10, max_comments_per_video: int = 30,
+                                          concurrency: int = 3) -> List[Dict]:
         """搜索视频并获取每个视频的评论（深度抓取版本）"""
         videos_with_comments = []
 
@@ -862,34 +1283,40 @@ class DouyinApi:
             logger.info(f"关键词: {keyword}, 最大视频数: {max_videos}")
             logger.info("=" * 50)
 
-            page = self.init_browser()
+            page = await self.init_browser()
 
-            # 步骤2: 先访问首页建立会话
-            logger.info("步骤1: 访问首页建立会话...")
-            try:
-                page.get("https://www.douyin.com/")
-                await asyncio.sleep(random.uniform(3, 5))
-                self._inject_stealth_on_page(page)
-            except:
-                pass
+            # 复用的浏览器已在抖音页面上时，直接请求搜索接口，跳过首页和搜索页导航
+            seen_urls = set()
+            videos = await self._search_via_api(page, keyword, seen_urls)
+
+            if not videos:
+                # 步骤2: 先访问首页建立会话
+                logger.info("步骤1: 访问首页建立会话...")
+                try:
+                    nav_start = time.time() * 1000
+                    page.get("https://www.douyin.com/")
+                    await self._wait_network_idle(page, since=nav_start, timeout=5)
+                except:
+                    pass
 
-            # 步骤3: 访问搜索页面获取视频列表
-            search_url = f"https://www.douyin.com/search/{quote(keyword)}?source=normal_search&type=video"
-            logger.info(f"步骤2: 访问搜索页面: {search_url}")
+                # 步骤3: 访问搜索页面获取视频列表
+                search_url = f"https://www.douyin.com/search/{quote(keyword)}?source=normal_search&type=video"
+                logger.info(f"步骤2: 访问搜索页面: {search_url}")
 
-            page.get(search_url)
-            await asyncio.sleep(random.uniform(5, 8))
-            self._inject_stealth_on_page(page)
+                page.listen.start(SEARCH_ITEM_API)
+                nav_start = time.time() * 1000
+                page.get(search_url)
+                await self._wait_network_idle(page, since=nav_start, timeout=8)
 
-            # 检查验证码
-            if self._check_for_captcha(page):
-                raise Exception("搜索页面触发验证码，无法继续")
+                # 检查验证码
+                if self._check_for_captcha(self._snapshot(page)):
+                    raise Exception("搜索页面触发验证码，无法继续")
 
-            # 步骤4: 提取视频列表
-            logger.info("步骤3: 提取视频列表...")
-            seen_urls = set()
-            videos = self._extract_video_data_direct(page, seen_urls)
-            logger.info(f"找到 {len(videos)} 个视频")
+                # 步骤4: 提取视频列表
+                logger.info("步骤3: 提取视频列表...")
+                videos = (self._extract_video_data_from_listener(page, seen_urls)
+                          or self._extract_video_data_direct(page, seen_urls))
+                logger.info(f"找到 {len(videos)} 个视频")
 
             if len(videos) == 0:
                 logger.warning("未找到视频，请检查搜索关键词或反爬状态")
@@ -899,26 +1326,22 @@ class DouyinApi:
             videos_to_process = videos[:max_videos]
             logger.info(f"将处理 {len(videos_to_process)} 个视频的评论")
 
-            # 步骤5: 逐个获取视频评论
-            for idx, video in enumerate(videos_to_process):
-                logger.info(f"\n{'='*30}")
-                logger.info(f"处理视频 {idx+1}/{len(videos_to_process)}: {video.get('title', '')[:40]}...")
-
-                try:
-                    # 获取评论
-                    video_with_comments = await self._get_video_with_comments(page, video.copy())
-                    videos_with_comments.append(video_with_comments)
-
-                    # 随机延迟，避免被检测
-                    delay = random.uniform(3, 6)
-                    logger.info(f"等待 {delay:.1f} 秒后处理下一个...")
-                    await asyncio.sleep(delay)
-
-                except Exception as e:
-                    logger.error(f"处理视频失败: {e}")
-                    video['comments'] = []
-                    video['comment_count'] = 0
-                    videos_with_comments.append(video)
+            # 步骤5: 多标签页并发获取视频评论（标签页共享同一浏览器会话的cookies）
+            semaphore = asyncio.BoundedSemaphore(max(1, concurrency))
+            self._tab_pool_size = max(1, concurrency)
+            total = len(videos_to_process)
+            results = await asyncio.gather(*[
+                self._get_video_with_comments_in_tab(page, video, idx, total, semaphore, max_comments_per_video)
+                for idx, video in enumerate(videos_to_process)
+            ], return_exceptions=True)
+
+            # 单个视频的异常不影响其他视频，降级为无评论
+            videos_with_comments = []
+            for video, result in zip(videos_to_process, results):
+                if isinstance(result, BaseException):
+                    logger.error(f"处理视频失败: {result}")
+                    result = {**video, 'comments': [], 'comment_count': 0}
+                videos_with_comments.append(result)
 
             logger.info(f"\n{'='*50}")
             logger.info(f"深度抓取完成!")
@@ -928,11 +1351,9 @@ class DouyinApi:
 
         except Exception as e:
             logger.error(f"深度抓取失败: {e}")
-            import traceback
             logger.error(traceback.format_exc())
         finally:
-            logger.info("清理: 关闭浏览器")
-            self.close_browser()
+            self._release_browser()
 
         return videos_with_comments
     
@@ -952,7 +1373,7 @@ class DouyinApi:
             last_height = initial_height
 
             for i in range(scroll_count):
-                logger.info(f"正在滚动页面 {i+1}/{scroll_count}")
+                logger.info("正在滚动页面 %d/%d", i + 1, scroll_count)
 
                 # 🔥 模拟真实用户滚动：分多次滚动，而不是一次滚到底
                 scroll_steps = random.randint(3, 5)  # 随机3-5次小滚动
@@ -962,8 +1383,8 @@ class DouyinApi:
                     await asyncio.sleep(random.uniform(0.3, 0.8))  # 随机短暂停顿
 
                 # 随机等待时间，模拟真实用户阅读
-                random_delay = delay + random.uniform(0, 1)
-                logger.info(f"等待 {random_delay:.1f} 秒...")
+                random_delay = delay + _human_delay(0.3, 0, 1)
+                logger.info("等待 %.1f 秒...", random_delay)
                 await asyncio.sleep(random_delay)
 
                 # 检查是否到达底部
@@ -972,7 +1393,7 @@ class DouyinApi:
                 # 直接提取视频数据（不获取HTML）
                 new_videos = self._extract_video_data_direct(page, seen_urls)
                 collected.extend(new_videos)
-                logger.info(f"本次滚动新增 {len(new_videos)} 条视频，累计 {len(collected)} 条")
+                logger.info("本次滚动新增 %d 条视频，累计 %d 条", len(new_videos), len(collected))
 
                 if new_height == last_height:
                     logger.info("已到达页面底部")
@@ -982,297 +1403,136 @@ class DouyinApi:
 
         except Exception as e:
             logger.error(f"滚动采集失败: {e}")
-            import traceback
             logger.error(f"详细错误:\n{traceback.format_exc()}")
 
         return collected
 
-    def _extract_video_data_direct(self, page, seen_urls: set) -> List[Dict]:
-        """直接从页面元素提取视频数据（改进版本 - 使用DrissionPage原生方法）"""
+    def _extract_video_data_from_listener(self, page, seen_urls: set) -> List[Dict]:
+        """从监听到的搜索接口响应中直接解析视频数据，无需DOM提取"""
         videos = []
-
         try:
-            # 使用DrissionPage原生方法查找链接
-            all_links = page.eles('tag:a', timeout=5)
-
-            # 筛选视频链接
-            video_links = []
-            for link in all_links:
-                try:
-                    href = link.attr('href') or ''
-                    if '/video/' in href:
-                        video_links.append(link)
-                except:
-                    continue
-
-            # 解析每个视频
-            for link in video_links[:50]:  # 最多处理50个
-                try:
-                    href = link.attr('href') or ''
-                    if not href:
-                        continue
-
-                    # 处理URL
-                    if href.startswith('//'):
-                        video_url = 'https:' + href
-                    elif href.startswith('/'):
-                        video_url = 'https://www.douyin.com' + href
-                    else:
-                        video_url = href
-
-                    # 去重
-                    if video_url in seen_urls:
-                        continue
+            packet = page.listen.wait(timeout=3)
+            page.listen.stop()
+            if not packet:
+                return []
 
-                    # 获取链接文本
-                    raw_text = link.text or ''
+            videos = self._parse_search_items(packet.response.body, seen_urls)
+            logger.info(f"从搜索接口响应解析到 {len(videos)} 条视频")
+        except Exception as e:
+            logger.warning(f"解析搜索接口响应失败，改用页面提取: {e}")
 
-                    # 使用清洗函数解析
-                    parsed = self._parse_video_title(raw_text)
+        return videos
 
-                    if parsed['title']:  # 只要有标题就保存
-                        video_data = {
-                            'video_url': video_url,
-                            'title': parsed['title'],
-                            'author': parsed['author'],
-                            'likes': parsed['likes'],
-                            'publish_time': parsed.get('publish_time', ''),
-                            'collected_at': datetime.now().isoformat()
-                        }
+    async def _search_via_api(self, page, keyword: str, seen_urls: set, count: int = 20) -> List[Dict]:
+        """
+        浏览器已停留在抖音页面时（keep_alive 复用），在页面内直接请求搜索接口，
+        跳过导航、渲染和DOM提取；cookies和签名参数由页面环境自动带上。失败返回空列表
+        """
+        try:
+            if 'douyin.com' not in (page.url or ''):
+                return []
+            url = SEARCH_ITEM_URL.format(count=count, keyword=quote(keyword))
+            body = await asyncio.to_thread(page.run_js, _JS_FETCH_JSON, url, timeout=15)
+            videos = self._parse_search_items(body, seen_urls)
+            if videos:
+                logger.info(f"直接请求搜索接口获取到 {len(videos)} 条视频")
+            return videos
+        except Exception as e:
+            logger.warning(f"直接请求搜索接口失败，改用页面搜索: {e}")
+            return []
 
-                        videos.append(video_data)
-                        seen_urls.add(video_url)
+    def _parse_search_items(self, body, seen_urls: set) -> List[Dict]:
+        """解析搜索接口JSON（data[].aweme_info）为视频列表"""
+        videos = []
+        if not isinstance(body, dict):
+            return videos
+        now_iso = datetime.now().isoformat()  # 同一批次共用采集时间
+
+        for entry in body.get('data') or []:
+            aweme = entry.get('aweme_info') or {}
+            aweme_id = aweme.get('aweme_id')
+            if not aweme_id:
+                continue
+
+            video_url = f"https://www.douyin.com/video/{aweme_id}"
+            if video_url in seen_urls:
+                continue
+
+            create_time = aweme.get('create_time')
+            videos.append({
+                'video_url': video_url,
+                'title': aweme.get('desc', ''),
+                'author': (aweme.get('author') or {}).get('nickname') or 'unknown',
+                'likes': str((aweme.get('statistics') or {}).get('digg_count', 0)),
+                'publish_time': datetime.fromtimestamp(create_time).strftime('%Y-%m-%d') if create_time else '',
+                'collected_at': now_iso
+            })
+            seen_urls.add(video_url)
 
-                except Exception as e:
-                    logger.debug(f"解析视频链接失败: {e}")
-                    continue
+        return videos
 
-            return videos
+    def _extract_video_data_direct(self, page, seen_urls: set) -> List[Dict]:
+        """直接从页面提取视频数据：一次JS调用取回所有视频链接的候选字段，Python端只做解析"""
+        videos = []
 
+        try:
+            js_results = page.run_js(_JS_EXTRACT_VIDEOS) or []
         except Exception as e:
             logger.error(f"提取视频数据失败: {e}")
-            import traceback
-            logger.error(f"详细错误:\n{traceback.format_exc()}")
+            return videos
 
-        # 如果DrissionPage方法失败，尝试原来的JS方法作为备用
-        try:
-            js_extract = """
-                (function() {
-                    const results = [];
-                    // 查找所有包含 /video/ 的链接
-                    const links = document.querySelectorAll('a[href*="/video/"]');
-                    links.forEach(function(link) {
-                        const href = link.getAttribute('href');
-                        if (href && href.includes('/video/')) {
-                            // 获取标题 - 尝试多种方式
-                            let title = '';
-
-                            // 方式1: 查找链接内的标题元素
-                            const titleElem = link.querySelector('p, span, div');
-                            if (titleElem && titleElem.textContent) {
-                                title = titleElem.textContent.trim();
-                            }
-
-                            // 方式2: 使用链接的title属性
-                            if (!title && link.title) {
-                                title = link.title.trim();
-                            }
-
-                            // 方式3: 使用链接的文本内容
-                            if (!title && link.textContent) {
-                                title = link.textContent.trim();
-                            }
-
-                            // 方式4: 查找父元素中的文本
-                            if (!title || title.length < 5) {
-                                const parent = link.closest('li') || link.closest('div');
-                                if (parent) {
-                                    const allText = parent.textContent || '';
-                                    if (allText.length > 5 && allText.length < 500) {
-                                        title = allText.trim();
-                                    }
-                                }
-                            }
-
-                            // 获取作者信息
-                            let author = '';
-                            const parent = link.closest('li') || link.closest('div');
-                            if (parent) {
-                                const authorElem = parent.querySelector('[class*="author"], [class*="name"], [class*="user"]');
-                                if (authorElem) {
-                                    author = authorElem.textContent.trim();
-                                }
-                            }
-
-                            // 获取点赞数
-                            let likes = '0';
-                            if (parent) {
-                                const likesElem = parent.querySelector('[class*="like"], [class*="count"]');
-                                if (likesElem) {
-                                    const likesText = likesElem.textContent.trim();
-                                    if (/\\d/.test(likesText)) {
-                                        likes = likesText;
-                                    }
-                                }
-                            }
-
-                            if (href && title && title.length > 3) {
-                                results.push({
-                                    href: href,
-                                    title: title.substring(0, 200),
-                                    author: author || 'unknown',
-                                    likes: likes
-                                });
-                            }
-                        }
-                    });
-                    return results;
-                })();
-            """
-            js_results = page.run_js(js_extract)
-
-            if js_results and len(js_results) > 0:
-                for item in js_results:
-                    href = item.get('href', '')
-                    if not href:
-                        continue
+        if not js_results:
+            logger.warning("页面上未找到视频链接")
+            # 调试：检查页面是否为验证码
+            if self._check_for_captcha(self._snapshot(page)):
+                logger.error("页面包含验证码相关内容")
+            return videos
 
-                    # 处理URL
-                    if href.startswith('//'):
-                        video_url = 'https:' + href
-                    elif href.startswith('/'):
-                        video_url = 'https://www.douyin.com' + href
-                    else:
-                        video_url = href
+        now_iso = datetime.now().isoformat()  # 同一批次共用采集时间
 
-                    # 去重
-                    if video_url in seen_urls:
-                        continue
+        # 解析每个视频
+        for item in js_results[:50]:  # 最多处理50个
+            try:
+                # 只接受带数字ID的视频链接，并统一为不带查询参数的标准地址，
+                # 与搜索接口解析出的地址一致，同一视频的不同链接也能去重
+                match = _VIDEO_URL_RE.search(item.get('href') or '')
+                if not match:
+                    continue
+                video_url = f"{DOUYIN_ORIGIN}/video/{match.group(1)}"
+
+                # 去重
+                if video_url in seen_urls:
+                    continue
 
+                # 优先解析链接文本，失败时使用JS端的备用标题/作者/点赞数
+                parsed = self._parse_video_title(item.get('text') or '')
+                if parsed['title']:
                     video_data = {
                         'video_url': video_url,
-                        'title': item.get('title', ''),
-                        'author': item.get('author', 'unknown'),
-                        'likes': item.get('likes', '0'),
-                        'collected_at': datetime.now().isoformat()
+                        'title': parsed['title'],
+                        'author': parsed['author'],
+                        'likes': parsed['likes'],
+                        'publish_time': parsed.get('publish_time', ''),
+                        'collected_at': now_iso
                     }
-
-                    videos.append(video_data)
-                    seen_urls.add(video_url)
-
-                if len(videos) > 0:
-                    return videos
-
-        except Exception as js_error:
-            logger.warning(f"JS提取失败: {js_error}")
-
-            # 方法2: 使用DrissionPage选择器（备用方案）
-            # 更精确的选择器列表
-            selectors = [
-                'css:a[href*="/video/"]',  # 直接找视频链接
-                'css:li a[href*="/video/"]',  # li中的视频链接
-                'css:div[class*="video"] a',  # 视频容器中的链接
-                'css:ul li',  # 列表项
-            ]
-
-            video_elements = []
-            used_selector = ""
-
-            for selector in selectors:
-                try:
-                    elements = page.eles(selector, timeout=3)
-                    if elements and len(elements) > 0:
-                        # 过滤：只保留包含/video/链接的元素
-                        valid_elements = []
-                        for elem in elements[:100]:  # 最多检查100个
-                            try:
-                                href = elem.attr('href') or ''
-                                if '/video/' in href:
-                                    valid_elements.append(elem)
-                                else:
-                                    # 检查子元素
-                                    sub_link = elem.ele('css:a[href*="/video/"]', timeout=0.3)
-                                    if sub_link:
-                                        valid_elements.append(elem)
-                            except:
-                                continue
-
-                        if valid_elements:
-                            video_elements = valid_elements
-                            used_selector = selector
-                            break
-                except Exception as sel_error:
-                    logger.warning(f"选择器 {selector} 失败: {sel_error}")
+                elif len(item.get('title') or '') > 3:
+                    video_data = {
+                        'video_url': video_url,
+                        'title': item['title'],
+                        'author': item.get('author') or 'unknown',
+                        'likes': item.get('likes') or '0',
+                        'publish_time': '',
+                        'collected_at': now_iso
+                    }
+                else:
                     continue
 
-            if not video_elements:
-                logger.warning("所有选择器都未找到有效视频元素")
-                # 调试：保存页面HTML用于分析
-                try:
-                    page_html = page.html[:10000] if page.html else ""
-                    if "验证" in page_html or "captcha" in page_html.lower():
-                        logger.error("页面包含验证码相关内容")
-                except:
-                    pass
-                return []
+                videos.append(video_data)
+                seen_urls.add(video_url)
 
-            # 解析每个元素
-            for idx, item in enumerate(video_elements[:50]):  # 最多处理50个
-                try:
-                    video_data = {}
-
-                    # 获取链接
-                    href = item.attr('href')
-                    if not href or '/video/' not in href:
-                        # 尝试查找子链接
-                        try:
-                            link_elem = item.ele('css:a[href*="/video/"]', timeout=0.3)
-                            if link_elem:
-                                href = link_elem.attr('href')
-                        except:
-                            continue
-
-                    if not href or '/video/' not in href:
-                        continue
-
-                    # 处理URL
-                    if href.startswith('//'):
-                        video_url = 'https:' + href
-                    elif href.startswith('/'):
-                        video_url = 'https://www.douyin.com' + href
-                    else:
-                        video_url = href
-
-                    # 去重
-                    if video_url in seen_urls:
-                        continue
-
-                    video_data['video_url'] = video_url
-
-                    # 获取标题
-                    try:
-                        text = item.text
-                        if text and len(text.strip()) > 3:
-                            video_data['title'] = text.strip()[:200]
-                    except:
-                        pass
-
-                    video_data['collected_at'] = datetime.now().isoformat()
-                    video_data['likes'] = '0'
-                    video_data['author'] = 'unknown'
-
-                    if video_data.get('title'):
-                        videos.append(video_data)
-                        seen_urls.add(video_url)
-
-                except Exception as item_error:
-                    logger.debug(f"解析元素 {idx} 失败: {item_error}")
-                    continue
-
-        except Exception as e:
-            logger.error(f"直接提取视频数据失败: {e}")
-            import traceback
-            logger.error(f"详细错误:\n{traceback.format_exc()}")
+            except Exception as e:
+                logger.debug("解析视频链接失败: %s", e)
+                continue
 
         return videos
 
@@ -1282,34 +1542,18 @@ class DouyinApi:
             logger.warning("BeautifulSoup4未安装，跳过数据提取")
             return []
 
+        from bs4 import BeautifulSoup, SoupStrainer
+
         videos = []
+        now_iso = datetime.now().isoformat()  # 同一批次共用采集时间
 
         try:
-            soup = BeautifulSoup(html_source, 'html.parser')
+            # lxml解析器（C实现）并且只构建视频项目容器的子树
+            soup = BeautifulSoup(html_source, 'lxml', parse_only=SoupStrainer('li', attrs={'class': re.compile('SwZLHMKk')}))
 
             # 查找视频项目容器
             video_items = soup.select('li.SwZLHMKk')
 
-            # 调试：如果没找到，尝试其他选择器
-            if len(video_items) == 0:
-                # 尝试查找所有的li标签
-                all_li = soup.find_all('li', limit=10)
-                if all_li:
-                    for idx, li in enumerate(all_li[:3]):  # 只显示前3个
-                        pass
-
-                # 尝试查找包含视频的其他常见选择器
-                alt_selectors = [
-                    'li[class*="video"]',
-                    'div[class*="video"]',
-                    'a[href*="/video/"]',
-                    'ul li',
-                ]
-                for selector in alt_selectors:
-                    items = soup.select(selector)
-                    if items:
-                        break
-            
             for item in video_items:
                 try:
                     video_data = {}
@@ -1327,12 +1571,7 @@ class DouyinApi:
                     # 提取视频链接
                     link_elem = item.select_one('a.hY8lWHgA')
                     if link_elem:
-                        href = link_elem.get('href', '')
-                        if href.startswith('//'):
-                            video_url = 'https:' + href
-                        else:
-                            video_url = href
-                        video_data['video_url'] = video_url
+                        video_data['video_url'] = _normalize_href(link_elem.get('href', ''))
                     else:
                         continue  # 没有链接就跳过
                     
@@ -1353,7 +1592,7 @@ class DouyinApi:
                         video_data['likes'] = '0'
                     
                     # 添加采集时间
-                    video_data['collected_at'] = datetime.now().isoformat()
+                    video_data['collected_at'] = now_iso
                     
                     # 只添加有标题的视频
                     if video_data.get('title'):
@@ -1361,7 +1600,7 @@ class DouyinApi:
                         seen_urls.add(video_data.get('video_url'))
                 
                 except Exception as e:
-                    logger.error(f"提取单个视频数据失败: {e}")
+                    logger.error("提取单个视频数据失败: %s", e)
                     continue
         
         except Exception as e:
@@ -1373,8 +1612,15 @@ class DouyinApi:
 class DouyinTool:
     """抖音工具主类"""
     
-    def __init__(self):
-        self.api = DouyinApi()
+    def __init__(self, keep_alive: bool = False):
+        self.api = DouyinApi(keep_alive=keep_alive)
+
+    async def __aenter__(self):
+        await self.api.__aenter__()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.api.__aexit__(exc_type, exc, tb)
     
     async def search_videos(self, keywords: str, scroll_count: int = 5) -> str:
         """搜索视频并返回格式化结果"""
@@ -1439,34 +1685,34 @@ class DouyinTool:
             logger.info(f'深度搜索关键词: {keywords}, 最大视频数: {max_videos}')
             videos = await self.api.search_videos_with_comments(keywords, max_videos, max_comments)
 
-            # 提取所有文本（标题+评论）
+            # 一次遍历提取所有文本（标题+描述+评论）并统计评论数
             raw_texts = []
             all_comments = []
+            total_comments = 0
 
             for video in videos:
-                # 添加标题
-                if video.get('title'):
-                    raw_texts.append(video['title'])
+                title = video.get('title')
+                if title:
+                    raw_texts.append(title)
 
-                # 添加描述
-                if video.get('description'):
-                    raw_texts.append(video['description'])
+                description = video.get('description')
+                if description:
+                    raw_texts.append(description)
 
-                # 添加评论
-                comments = video.get('comments', [])
+                comments = video.get('comments') or []
+                total_comments += len(comments)
+                video_title = title or ''
                 for comment in comments:
-                    comment_text = comment.get('text', '')
+                    comment_text = comment.get('text')
                     if comment_text:
                         raw_texts.append(comment_text)
                         all_comments.append({
-                            'video_title': video.get('title', ''),
+                            'video_title': video_title,
                             'comment_text': comment_text,
                             'username': comment.get('username', 'unknown'),
                             'likes': comment.get('likes', '0')
                         })
 
-            total_comments = sum(v.get('comment_count', 0) for v in videos)
-
             return {
                 'videos': videos,
                 'raw_texts': raw_texts,
@@ -1497,6 +1743,8 @@ async def main():
     parser.add_argument('--limit', type=int, default=20, help='返回结果数量限制（默认20条）')
     parser.add_argument('--max-videos', type=int, default=10, help='深度抓取时的最大视频数（默认10）')
     parser.add_argument('--max-comments', type=int, default=30, help='每个视频的最大评论数（默认30）')
+    parser.add_argument('--clear-cache', action='store_true', help='运行前清空浏览器用户目录和磁盘缓存')
+    parser.add_argument('--stream', action='store_true', help='逐条流式输出JSON（每个元素一行），降低大结果集的峰值内存')
 
     args = parser.parse_args()
 
@@ -1511,6 +1759,11 @@ async def main():
         print("请运行: pip install beautifulsoup4", file=sys.stderr)
         sys.exit(1)
 
+    if args.clear_cache:
+        browser_data_dir = _browser_data_dir()
+        shutil.rmtree(browser_data_dir, ignore_errors=True)
+        logger.info(f"已清空浏览器缓存目录: {browser_data_dir}")
+
     # 初始化工具
     tool = DouyinTool()
 
@@ -1528,7 +1781,10 @@ async def main():
                 sys.exit(1)
             result = await tool.search_videos_raw(args.keywords, args.scroll_count, args.limit)
             # 确保输出UTF-8编码的JSON到stdout
-            print(json.dumps(result, ensure_ascii=False, indent=2))
+            if args.stream:
+                _stream_json(result)
+            else:
+                _print_json(result)
 
         elif args.action == 'search-with-comments':
             if not args.keywords:
@@ -1541,7 +1797,10 @@ async def main():
                 max_comments=args.max_comments
             )
             # 输出结果
-            print(json.dumps(result, ensure_ascii=False, indent=2))
+            if args.stream:
+                _stream_json(result)
+            else:
+                _print_json(result)
 
     except Exception as e:
         logger.error(f"操作失败: {e}")
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Embedding 磁盘缓存 - 以 (模型, 文本) 的哈希为键保存向量
+相同文本跨次运行只需请求一次 API
+"""
+
+import hashlib
+import os
+import sqlite3
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# 默认缓存目录（项目根目录下的 .cache/embeddings）
+DEFAULT_CACHE_DIR = Path(__file__).parent.parent / '.cache' / 'embeddings'
+
+# sqlite 单条语句的参数个数有上限，批量查询时按此分块
+_QUERY_CHUNK = 500
+
+
+class EmbeddingCache:
+    """基于 sqlite 的 embedding 缓存，向量以 float32 字节存储"""
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        path = Path(cache_dir or os.getenv('EMBEDDING_CACHE_DIR') or DEFAULT_CACHE_DIR)
+        path.mkdir(parents=True, exist_ok=True)
+
+        self._conn = sqlite3.connect(str(path / 'embeddings.sqlite3'))
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS embeddings (key BLOB PRIMARY KEY, vector BLOB NOT NULL)'
+        )
+
+    @staticmethod
+    def make_key(model: str, text: str) -> bytes:
+        """缓存键：sha1(模型|文本)，换模型后不会误用旧向量"""
+        return hashlib.sha1(f"{model}|{text}".encode('utf-8')).digest()
+
+    def get_many(self, keys: List[bytes]) -> Dict[bytes, np.ndarray]:
+        """批量查询，返回命中的 {key: 向量}"""
+        found = {}
+        for i in range(0, len(keys), _QUERY_CHUNK):
+            chunk = keys[i:i + _QUERY_CHUNK]
+            placeholders = ','.join('?' * len(chunk))
+            rows = self._conn.execute(
+                f'SELECT key, vector FROM embeddings WHERE key IN ({placeholders})', chunk
+            )
+            for key, vector in rows:
+                found[bytes(key)] = np.frombuffer(vector, dtype=np.float32)
+        return found
+
+    def set_many(self, items: Iterable[Tuple[bytes, Iterable[float]]]):
+        """批量写入（单个事务）"""
+        rows = [(key, np.asarray(vector, dtype=np.float32).tobytes()) for key, vector in items]
+        with self._conn:
+            self._conn.executemany('INSERT OR REPLACE INTO embeddings VALUES (?, ?)', rows)
+
+    def close(self):
+        self._conn.close()
@@ -4,20 +4,40 @@
 替代原有的 Jaccard 聚类算法，提供更好的语义相似度聚类
 """
 
+import asyncio
+import importlib.util
 import json
 import sys
 import os
 import re
+import random
 import time
 import logging
-from typing import List, Dict, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, List, Dict, Optional, Tuple
 from pathlib import Path
 
+import httpx
 import numpy as np
-from sklearn.cluster import DBSCAN
-from sklearn.metrics.pairwise import cosine_distances
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components
+from sklearn.neighbors import NearestNeighbors
 from sklearn.metrics import silhouette_score, davies_bouldin_score
 
+from embedding_cache import EmbeddingCache
+
+# 可选：orjson 序列化/解析更快（请求数多时累计明显），未安装时回退到标准库 json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# 可选：Hyperscan（SIMD 加速的 DFA 正则引擎），安装后噪音/白名单一次扫描完成，未安装时回退到 re
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
 # 加载环境变量
 from dotenv import load_dotenv
 env_path = Path(__file__).parent.parent
@@ -27,6 +47,24 @@ load_dotenv(env_path / '.env')
 # 配置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
+# httpx 每个请求都会打一条 INFO 日志，并发时会刷屏
+logging.getLogger('httpx').setLevel(logging.WARNING)
+
+
+def _json_dumps(obj, indent: bool = False) -> bytes:
+    """UTF-8 JSON 字节，indent=True 时格式与 json.dumps(ensure_ascii=False, indent=2) 一致"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+        except TypeError:
+            # 例如超出64位的整数，交给标准库处理
+            pass
+    return json.dumps(obj, ensure_ascii=False, indent=2 if indent else None).encode('utf-8')
+
+
+def _json_loads(data: bytes):
+    """解析 JSON 字节"""
+    return orjson.loads(data) if orjson is not None else json.loads(data)
 
 
 # ==================== 数据清洗模块 ====================
@@ -51,7 +89,9 @@ class DataCleaner:
         r'^收藏$',
         r'^[啊哦嗯唔额]+$',  # 纯语气词
         r'^[\d\.]+$',       # 纯数字
-        r'^👍❤️💕🎉😀😁😂🤣😃😄😅😆😊😋😎💪👏🙏✨🌟⭐️🔥💯🎊🎁🎈🌈☀️🌙⚡️💫\s*]+$',  # 纯表情
+        # 纯表情：按码位区间覆盖全部 emoji（含肤色、变体选择符、零宽连接符、键帽），
+        # 用普通字符串写入实际字符，re 与 Hyperscan 都能识别
+        '^[\U0001F000-\U0001FAFF\u2300-\u23FF\u2600-\u27BF\u2B00-\u2BFF\u200D\u20E3\uFE0F\\s]+$',
     ]
 
     # 无效短语列表（通用社交表达）
@@ -113,9 +153,63 @@ class DataCleaner:
         '教程', '步骤', '方法', '攻略', '指南', '教学',
     ]
 
+    # 去重后文本数超过该值时多进程并行清洗（进程启动有固定开销，小批量不划算）
+    PARALLEL_MIN_TEXTS = 20000
+
+    # 纯疑问词（配合问号且文本很短时视为无实质内容）
+    SIMPLE_QUESTIONS = ['啥', '什么意思', '真的吗', '是吗', '这是啥', '谁啊']
+
     def __init__(self, min_length: int = 4):
         self.min_length = min_length
-        self.noise_regexes = [re.compile(p) for p in self.NOISE_PATTERNS]
+        # 所有噪音正则合并为一个交替式，每条文本只需一次匹配
+        self.noise_regex = re.compile('|'.join(f'(?:{p})' for p in self.NOISE_PATTERNS))
+        # 噪音短语精确匹配用集合，O(1) 查找
+        self._noise_phrase_set = frozenset(p.lower() for p in self.NOISE_PHRASES)
+        # 白名单关键词合并为一个正则，一次扫描完成
+        self._whitelist_re = re.compile('|'.join(map(re.escape, self.WHITELIST_KEYWORDS)))
+        self._simple_question_re = re.compile('|'.join(map(re.escape, self.SIMPLE_QUESTIONS)))
+        self._digit_re = re.compile(r'\d')
+        # 规范化形式：去掉标点/表情/空白并转小写，用于合并近似重复
+        self._canon_strip_re = re.compile(r'[^\w\u4e00-\u9fff]+')
+        self._hs_db = self._build_hyperscan_db()
+
+    def _build_hyperscan_db(self):
+        """把噪音正则和白名单关键词编译进同一个 Hyperscan 数据库（不可用时返回 None）"""
+        if hyperscan is None:
+            return None
+
+        expressions = self.NOISE_PATTERNS + [re.escape(k) for k in self.WHITELIST_KEYWORDS]
+        try:
+            db = hyperscan.Database(mode=hyperscan.HS_MODE_BLOCK)
+            db.compile(
+                expressions=[e.encode('utf-8') for e in expressions],
+                ids=list(range(len(expressions))),
+                elements=len(expressions),
+                flags=[hyperscan.HS_FLAG_UTF8 | hyperscan.HS_FLAG_UCP | hyperscan.HS_FLAG_SINGLEMATCH] * len(expressions)
+            )
+            return db
+        except Exception as e:
+            logger.debug(f"Hyperscan 编译失败，回退到 re: {e}")
+            return None
+
+    def _scan(self, text: str) -> Tuple[bool, bool]:
+        """一次扫描同时判断：(命中噪音正则, 包含白名单关键词)"""
+        if self._hs_db is None:
+            return self.noise_regex.match(text) is not None, self._whitelist_re.search(text) is not None
+
+        n_noise = len(self.NOISE_PATTERNS)
+        hits = [False, False]
+
+        def on_match(pattern_id, start, end, flags, context):
+            hits[0 if pattern_id < n_noise else 1] = True
+            return hits[0] and hits[1]  # 两类都命中后提前结束扫描
+
+        try:
+            self._hs_db.scan(text.encode('utf-8'), match_event_handler=on_match)
+        except hyperscan.ScanTerminated:
+            # 回调返回True提前结束时，python-hyperscan 以异常形式通知
+            pass
+        return hits[0], hits[1]
 
     def is_noise(self, text: str) -> bool:
         """判断文本是否为噪音"""
@@ -126,35 +220,30 @@ class DataCleaner:
             return True
 
         # 匹配噪音正则
-        for regex in self.noise_regexes:
-            if regex.match(text):
-                return True
+        if self._scan(text)[0]:
+            return True
 
         # 匹配噪音短语
-        text_lower = text.lower()
-        for phrase in self.NOISE_PHRASES:
-            if text_lower == phrase.lower():
-                return True
-
-        return False
+        return text.lower() in self._noise_phrase_set
 
     def has_whitelist_keyword(self, text: str) -> bool:
         """检查是否包含白名单关键词"""
-        for keyword in self.WHITELIST_KEYWORDS:
-            if keyword in text:
-                return True
-        return False
+        return self._scan(text)[1]
 
-    def calculate_score(self, text: str) -> float:
+    def calculate_score(self, text: str, has_whitelist: Optional[bool] = None) -> float:
         """
         计算文本质量分数（用于排序和筛选代表性文本）
         分数越高，文本越有价值
+        has_whitelist: 已扫描过白名单时直接传入，避免重复扫描
         """
         score = 1.0
         length = len(text)
 
+        if has_whitelist is None:
+            has_whitelist = self.has_whitelist_keyword(text)
+
         # 白名单关键词加权（痛点相关）
-        if self.has_whitelist_keyword(text):
+        if has_whitelist:
             score += 2.0
 
         # 长度加权（50-200字符最佳，有实质内容）
@@ -171,15 +260,14 @@ class DataCleaner:
         question_marks = text.count('?') + text.count('？')
         if question_marks > 0:
             # 但如果是纯疑问词+问号（无实质内容），则扣分
-            simple_questions = ['啥', '什么意思', '真的吗', '是吗', '这是啥', '谁啊']
-            is_simple_question = any(q in text for q in simple_questions) and length < 15
+            is_simple_question = length < 15 and self._simple_question_re.search(text) is not None
             if is_simple_question:
                 score -= 1.0
             else:
                 score += 0.3 * min(question_marks, 2)  # 最多加0.6分
 
         # 包含数字加权（可能包含具体数据/价格）
-        if re.search(r'\d+', text):
+        if self._digit_re.search(text):
             score += 0.3
 
         # 包含感叹号过多扣分（可能是情绪化表达）
@@ -189,45 +277,185 @@ class DataCleaner:
 
         return score
 
-    def clean(self, texts: List[str]) -> Tuple[List[str], List[float]]:
+    def calculate_scores(self, texts: List[str], has_whitelist: List[bool]) -> np.ndarray:
         """
-        清洗文本列表
-        返回: (清洗后的文本列表, 对应的质量分数)
+        批量计算质量分数，规则与 calculate_score 完全一致
+        每条文本只提取一次特征，加权逻辑全部用向量运算完成
         """
-        cleaned = []
-        scores = []
-        seen = set()  # 去重
+        n = len(texts)
+        lengths = np.fromiter((len(t) for t in texts), dtype=np.int64, count=n)
+        question_marks = np.fromiter((t.count('?') + t.count('？') for t in texts), dtype=np.int64, count=n)
+        exclamation_marks = np.fromiter((t.count('!') + t.count('！') for t in texts), dtype=np.int64, count=n)
+        has_digit = np.fromiter((self._digit_re.search(t) is not None for t in texts), dtype=bool, count=n)
+        is_simple_question = np.fromiter(
+            (len(t) < 15 and self._simple_question_re.search(t) is not None for t in texts),
+            dtype=bool, count=n
+        )
 
-        for text in texts:
-            text = text.strip()
+        # 加权顺序与 calculate_score 相同，保证浮点结果逐位一致
+        scores = np.ones(n)
+        scores += np.where(np.asarray(has_whitelist, dtype=bool), 2.0, 0.0)
+        scores += np.select(
+            [(lengths >= 50) & (lengths <= 200), (lengths >= 20) & (lengths < 50), (lengths >= 10) & (lengths < 20), lengths > 300],
+            [1.0, 0.5, 0.2, -0.5],
+            0.0
+        )
+        scores += np.where(
+            question_marks > 0,
+            np.where(is_simple_question, -1.0, 0.3 * np.minimum(question_marks, 2)),
+            0.0
+        )
+        scores += np.where(has_digit, 0.3, 0.0)
+        scores -= np.where(exclamation_marks > 2, 0.5, 0.0)
+        return scores
+
+    def canonicalize(self, text: str) -> str:
+        """近似重复判定用的规范化形式（全是标点/表情时退回原文）"""
+        return self._canon_strip_re.sub('', text.lower()) or text
+
+    def _classify(self, text: str) -> Optional[Tuple[bool, str]]:
+        """单条文本（已 strip）：噪音返回 None，否则返回 (是否含白名单关键词, 规范化形式)"""
+        # 噪音正则与白名单一次扫描完成
+        if len(text) < self.min_length or text.lower() in self._noise_phrase_set:
+            return None
+        is_noise_match, has_whitelist = self._scan(text)
+        if is_noise_match:
+            return None
+        return has_whitelist, self.canonicalize(text)
+
+    def clean(self, texts: List[str]) -> Tuple[List[str], List[float], List[int]]:
+        """
+        清洗文本列表
+        只有标点、表情、大小写或空白不同的近似重复合并为一条（保留首次出现的原文），
+        权重记录合并了多少条不同的原文，供聚类时保持密度
+        返回: (清洗后的文本列表, 对应的质量分数, 对应的权重)
+        """
+        # 去空白、精确去重（保持首次出现顺序）
+        unique_texts = list(dict.fromkeys(t for t in (text.strip() for text in texts) if t))
+
+        # 噪音判定 + 白名单扫描 + 规范化：逐条独立，数据量大时分块交给多进程
+        workers = min(_available_cpus(), 8)
+        if len(unique_texts) >= self.PARALLEL_MIN_TEXTS and workers > 1:
+            chunk_size = (len(unique_texts) + workers - 1) // workers
+            chunks = [unique_texts[i:i + chunk_size] for i in range(0, len(unique_texts), chunk_size)]
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                parts = executor.map(_classify_chunk, [self.min_length] * len(chunks), chunks)
+                classified = [item for part in parts for item in part]
+        else:
+            # 串行时逐条惰性判定，不再物化整份中间结果列表
+            classified = map(self._classify, unique_texts)
 
-            # 跳过空文本
-            if not text:
-                continue
+        cleaned = []
+        whitelist_flags = []
+        weights = []
+        canon_index = {}  # 规范化形式 -> cleaned 中的下标
 
-            # 去重
-            if text in seen:
+        for text, result in zip(unique_texts, classified):
+            # 跳过噪音
+            if result is None:
                 continue
-            seen.add(text)
+            has_whitelist, canon = result
 
-            # 跳过噪音
-            if self.is_noise(text):
+            # 近似重复：计入已有文本的权重，不再单独请求 Embedding
+            if canon in canon_index:
+                weights[canon_index[canon]] += 1
                 continue
+            canon_index[canon] = len(cleaned)
 
-            score = self.calculate_score(text)
             cleaned.append(text)
-            scores.append(score)
+            whitelist_flags.append(has_whitelist)
+            weights.append(1)
+
+        # 质量分数批量计算
+        scores = self.calculate_scores(cleaned, whitelist_flags).tolist()
+
+        kept = sum(weights)
+        logger.info(f"数据清洗完成: {len(texts)} -> {kept} 条 (过滤了 {len(texts) - kept} 条噪音)")
+        if kept > len(cleaned):
+            logger.info(f"合并近似重复: {kept} -> {len(cleaned)} 条待 Embedding")
+        return cleaned, scores, weights
+
+
+def _available_cpus() -> int:
+    """当前进程实际可用的 CPU 数（容器/affinity 限制下可能小于 os.cpu_count()）"""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
 
-        logger.info(f"数据清洗完成: {len(texts)} -> {len(cleaned)} 条 (过滤了 {len(texts) - len(cleaned)} 条噪音)")
-        return cleaned, scores
+
+def _classify_chunk(min_length: int, texts: List[str]) -> List[Optional[Tuple[bool, str]]]:
+    """多进程清洗的工作函数（需为模块级函数才能被 pickle）"""
+    cleaner = DataCleaner(min_length=min_length)
+    return [cleaner._classify(text) for text in texts]
 
 
 # ==================== Embedding 模块 ====================
 
+def normalize_embeddings(embeddings: np.ndarray, copy: bool = True) -> np.ndarray:
+    """
+    转为 float32 并做 L2 归一化，之后余弦相似度就是点积
+    copy=False 时若输入已是 float32 数组则原地归一化
+    """
+    normalized = np.array(embeddings, dtype=np.float32) if copy else np.asarray(embeddings, dtype=np.float32)
+    normalized /= np.linalg.norm(normalized, axis=1, keepdims=True).clip(min=1e-12)
+    return normalized
+
+
+
+class TokenBucket:
+    """
+    令牌桶限流：请求数（RPM）和 token 数（TPM）两个桶按时间匀速补充，
+    额度充足时直接放行（允许短时突发），不足时只等待到额度补足为止
+    """
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: Optional[float] = None):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.request_tokens = float(requests_per_minute)
+        self.token_tokens = float(tokens_per_minute or 0)
+        self.last_refill = time.monotonic()
+        self._lock: Optional[asyncio.Lock] = None
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self.last_refill
+        self.last_refill = now
+        self.request_tokens = min(self.requests_per_minute, self.request_tokens + elapsed * self.requests_per_minute / 60.0)
+        if self.tokens_per_minute:
+            self.token_tokens = min(self.tokens_per_minute, self.token_tokens + elapsed * self.tokens_per_minute / 60.0)
+
+    async def acquire(self, n_tokens: int = 0):
+        """占用一次请求额度和 n_tokens 个 token 额度"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        # 单次请求超过整桶容量时按整桶计，避免永远等不到
+        if self.tokens_per_minute:
+            n_tokens = min(n_tokens, self.tokens_per_minute)
+
+        # 持锁等待，保证先到先得
+        async with self._lock:
+            while True:
+                self._refill()
+                request_short = 1.0 - self.request_tokens
+                token_short = n_tokens - self.token_tokens if self.tokens_per_minute else 0.0
+                if request_short <= 0 and token_short <= 0:
+                    self.request_tokens -= 1.0
+                    if self.tokens_per_minute:
+                        self.token_tokens -= n_tokens
+                    return
+
+                wait = max(
+                    request_short * 60.0 / self.requests_per_minute,
+                    token_short * 60.0 / self.tokens_per_minute if token_short > 0 else 0.0
+                )
+                await asyncio.sleep(wait)
+
+
 class ZhipuEmbedding:
     """智谱AI Embedding 服务"""
 
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, use_cache: Optional[bool] = None):
         self.api_key = api_key or os.getenv('GLM_API_KEY')
         if not self.api_key:
             raise ValueError("未找到 GLM_API_KEY，请在 .env.local 或环境变量中配置")
@@ -235,55 +463,109 @@ class ZhipuEmbedding:
         self.base_url = "https://open.bigmodel.cn/api/paas/v4/embeddings"
         self.model = os.getenv('GLM_EMBEDDING_MODEL', 'embedding-3')
         self.batch_size = 25  # 每批最大数量
-        self.rate_limit_delay = 0.5  # 请求间隔（秒）
-
-    def _get_embedding_batch(self, texts: List[str]) -> List[List[float]]:
-        """获取一批文本的 embedding"""
-        import urllib.request
-        import urllib.error
-
-        headers = {
+        self.concurrency = int(os.getenv('GLM_EMBEDDING_CONCURRENCY', '8'))  # 同时在途的请求数
+        self.requests_per_minute = int(os.getenv('GLM_EMBEDDING_RPM', '600'))  # 每分钟请求上限
+        self.tokens_per_minute = int(os.getenv('GLM_EMBEDDING_TPM', '0')) or None  # 每分钟 token 上限（0 为不限）
+        # 限流额度在多次调用间共享
+        self._bucket = TokenBucket(self.requests_per_minute, self.tokens_per_minute)
+        self.max_retries = 5  # 限流/服务端错误时的最大重试次数
+
+        # 请求头只构造一次；连接池和事件循环在多次调用间复用，省去重复的 TCP/TLS 握手
+        self._headers = {
             'Authorization': f'Bearer {self.api_key}',
             'Content-Type': 'application/json'
         }
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._client: Optional[httpx.AsyncClient] = None
+
+        # 磁盘缓存：相同 (模型, 文本) 跨次运行不再重复请求
+        if use_cache is None:
+            use_cache = os.getenv('GLM_EMBEDDING_CACHE', 'true').lower() not in ('0', 'false', 'no')
+        self._cache: Optional[EmbeddingCache] = None
+        if use_cache:
+            try:
+                self._cache = EmbeddingCache()
+            except Exception as e:
+                logger.warning(f"Embedding 缓存不可用，直接请求 API: {e}")
+
+    # 需要重试的状态码（限流 + 网关/服务端临时错误）
+    RETRY_STATUS = frozenset({429, 500, 502, 503, 504})
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """获取复用的 HTTP 客户端（keep-alive，装了 h2 时启用 HTTP/2）"""
+        if self._client is None:
+            limits = httpx.Limits(max_connections=16, max_keepalive_connections=16, keepalive_expiry=30)
+            transport = httpx.AsyncHTTPTransport(
+                limits=limits,
+                retries=3,  # 仅重试建连失败
+                http2=importlib.util.find_spec('h2') is not None
+            )
+            self._client = httpx.AsyncClient(headers=self._headers, timeout=30, transport=transport)
+        return self._client
+
+    def close(self):
+        """关闭连接池、事件循环和缓存"""
+        if self._cache is not None:
+            self._cache.close()
+            self._cache = None
+        if self._loop is None:
+            return
+        if self._client is not None:
+            self._loop.run_until_complete(self._client.aclose())
+            self._client = None
+        self._loop.close()
+        self._loop = None
+
+    async def _request_embedding(self, client: httpx.AsyncClient, semaphore: asyncio.Semaphore, text: str) -> List[float]:
+        """请求单条文本的 embedding，429 时指数退避重试"""
+        payload = {
+            'model': self.model,
+            'input': text
+        }
 
-        # 智谱 API 需要逐个请求
-        embeddings = []
-        for text in texts:
-            data = json.dumps({
-                'model': self.model,
-                'input': text
-            }).encode('utf-8')
+        for attempt in range(self.max_retries + 1):
+            async with semaphore:
+                # 中文约 1 字 1 token，按字符数估算
+                await self._bucket.acquire(len(text))
+                response = await client.post(self.base_url, content=_json_dumps(payload))
 
-            req = urllib.request.Request(self.base_url, data=data, headers=headers)
+            if response.status_code in self.RETRY_STATUS and attempt < self.max_retries:
+                backoff = min(2 ** attempt, 30) + random.uniform(0, 1)
+                logger.warning(f"请求失败 ({response.status_code})，{backoff:.1f} 秒后重试 ({attempt + 1}/{self.max_retries})")
+                await asyncio.sleep(backoff)
+                continue
 
-            try:
-                with urllib.request.urlopen(req, timeout=30) as response:
-                    result = json.loads(response.read().decode('utf-8'))
-                    embedding = result['data'][0]['embedding']
-                    embeddings.append(embedding)
-            except urllib.error.HTTPError as e:
-                error_body = e.read().decode('utf-8')
-                logger.error(f"API 错误: {e.code} - {error_body}")
-                raise
-            except Exception as e:
-                logger.error(f"请求失败: {e}")
-                raise
+            if response.status_code >= 400:
+                logger.error(f"API 错误: {response.status_code} - {response.text}")
+                response.raise_for_status()
+
+            return _json_loads(response.content)['data'][0]['embedding']
+
+    async def _get_embedding_batch_async(
+        self,
+        client: httpx.AsyncClient,
+        semaphore: asyncio.Semaphore,
+        texts: List[str]
+    ) -> List[List[float]]:
+        """并发获取一批文本的 embedding（结果顺序与输入一致）"""
+        results = await asyncio.gather(
+            *(self._request_embedding(client, semaphore, text) for text in texts),
+            return_exceptions=True
+        )
 
-            # 添加延迟避免限流
-            time.sleep(self.rate_limit_delay)
+        for result in results:
+            if isinstance(result, BaseException):
+                logger.error(f"请求失败: {result}")
+                raise result
 
-        return embeddings
+        return results
 
-    def get_embeddings(self, texts: List[str]) -> np.ndarray:
-        """
-        获取文本列表的 embedding 向量
-        自动处理批量请求和限流
-        """
-        if not texts:
-            return np.array([])
+    async def _get_embeddings_async(self, texts: List[str], on_batch: Callable[[int, List[List[float]]], None]):
+        """在同一个连接池内完成所有批次，每批结果交给 on_batch(起始下标, 向量列表)"""
+        # 智谱 API 需要逐个请求，用信号量控制并发、令牌桶限流
+        semaphore = asyncio.Semaphore(self.concurrency)
+        client = self._get_client()
 
-        all_embeddings = []
         total_batches = (len(texts) + self.batch_size - 1) // self.batch_size
 
         for i in range(0, len(texts), self.batch_size):
@@ -291,26 +573,140 @@ class ZhipuEmbedding:
             batch_num = i // self.batch_size + 1
             logger.info(f"正在获取 Embedding: 批次 {batch_num}/{total_batches} ({len(batch)} 条)")
 
-            embeddings = self._get_embedding_batch(batch)
-            all_embeddings.extend(embeddings)
+            embeddings = await self._get_embedding_batch_async(client, semaphore, batch)
+            on_batch(i, embeddings)
+
+    def get_embeddings(self, texts: List[str]) -> np.ndarray:
+        """
+        获取文本列表的 embedding 向量
+        优先读磁盘缓存，只为未命中的文本请求 API，自动处理并发请求和限流
+        """
+        if not texts:
+            return np.array([], dtype=np.float32)
+
+        keys = [EmbeddingCache.make_key(self.model, text) for text in texts]
+        cached = {}
+        if self._cache is not None:
+            try:
+                cached = self._cache.get_many(keys)
+            except Exception as e:
+                logger.warning(f"读取 Embedding 缓存失败: {e}")
+
+        # 未命中的文本（同一文本只请求一次）
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in missing:
+                missing[key] = text
+
+        if cached:
+            logger.info(f"Embedding 缓存命中 {len(texts) - len(missing)}/{len(texts)} 条")
+
+        # 每个 key 在输出中的行号（输入里有重复文本时对应多行）
+        rows = {}
+        for row, key in enumerate(keys):
+            rows.setdefault(key, []).append(row)
+
+        # 输出矩阵在拿到第一条向量、得知维度后一次性分配，各批次直接写入对应行
+        out = None
 
-        return np.array(all_embeddings)
+        def write_rows(batch_keys, vectors: np.ndarray):
+            nonlocal out
+            if out is None:
+                out = np.empty((len(texts), vectors.shape[1]), dtype=np.float32)
+            for key, vector in zip(batch_keys, vectors):
+                out[rows[key]] = vector
+
+        if cached:
+            write_rows(list(cached), np.stack(list(cached.values())))
+
+        if missing:
+            missing_keys = list(missing)
+
+            def store_batch(start: int, embeddings: List[List[float]]):
+                batch_keys = missing_keys[start:start + len(embeddings)]
+                vectors = np.asarray(embeddings, dtype=np.float32)
+                write_rows(batch_keys, vectors)
+
+                # 每批请求完就写缓存，中途失败时已完成的批次下次不必重取
+                if self._cache is not None:
+                    try:
+                        self._cache.set_many(zip(batch_keys, vectors))
+                    except Exception as e:
+                        logger.warning(f"写入 Embedding 缓存失败: {e}")
+
+            # 客户端绑定在事件循环上，因此循环也在实例上复用而不是每次 asyncio.run
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+            self._loop.run_until_complete(self._get_embeddings_async(list(missing.values()), store_batch))
+
+        # 统一为 L2 归一化的 float32（原地归一化）：内存减半，下游余弦运算直接用点积
+        return normalize_embeddings(out, copy=False)
 
 
 # ==================== 聚类模块 ====================
 
+def radius_neighbor_graph(normalized: np.ndarray, radius: float):
+    """
+    稀疏的余弦距离邻居图：只保留距离 <= radius 的边
+    DBSCAN 只需要 eps 以内的邻居，内存从 O(n²) 降到 O(n·平均邻居数)
+    """
+    nn = NearestNeighbors(radius=radius, metric='cosine', algorithm='brute', n_jobs=-1).fit(normalized)
+    return nn.radius_neighbors_graph(normalized, radius=radius, mode='distance')
+
+
+def dbscan_on_graph(graph, eps: float, min_samples: int, sample_weight=None) -> np.ndarray:
+    """
+    在稀疏邻居图上直接执行 DBSCAN，标签与 sklearn DBSCAN(metric='precomputed') 完全一致
+    核心点之间的连通分量即为聚类；边界点归入相邻核心点中编号最小的聚类
+    （sklearn 按下标顺序逐个扩展聚类，先扩展的聚类先占据边界点）
+    """
+    n = graph.shape[0]
+    weights = np.ones(n) if sample_weight is None else np.asarray(sample_weight, dtype=np.float64)
+
+    # eps 以内的邻接关系（去掉自环，自身权重单独计入）
+    graph = graph.tocsr()
+    rows = np.repeat(np.arange(n), np.diff(graph.indptr))
+    keep = (graph.data <= eps) & (graph.indices != rows)
+    adjacency = csr_matrix(
+        (np.ones(int(keep.sum()), dtype=np.int8), (rows[keep], graph.indices[keep])),
+        shape=(n, n)
+    )
+
+    # 核心点：邻域内（含自身）的权重之和 >= min_samples
+    is_core = adjacency @ weights + weights >= min_samples
+    labels = np.full(n, -1, dtype=np.int64)
+    core_idx = np.flatnonzero(is_core)
+    if len(core_idx) == 0:
+        return labels
+
+    # 核心点连通分量按最小下标编号，与 sklearn 的扩展顺序一致
+    _, labels[core_idx] = connected_components(adjacency[core_idx][:, core_idx], directed=False)
+
+    # 边界点：非核心点取相邻核心点中最小的聚类编号
+    border_idx = np.flatnonzero(~is_core)
+    to_core = adjacency[border_idx][:, core_idx].tocsr()
+    has_core = np.diff(to_core.indptr) > 0
+    if has_core.any():
+        core_labels = labels[core_idx][to_core.indices]
+        labels[border_idx[has_core]] = np.minimum.reduceat(core_labels, to_core.indptr[:-1][has_core])
+
+    return labels
+
+
 def optimize_clustering_params(
     embeddings: np.ndarray,
     eps_range: List[float] = [0.2, 0.25, 0.3],
-    min_samples_range: Optional[List[int]] = None
+    min_samples_range: Optional[List[int]] = None,
+    sample_weight: Optional[List[int]] = None
 ) -> Tuple[float, int]:
     """
     自动优化DBSCAN聚类参数
 
     参数:
-        embeddings: 向量矩阵
+        embeddings: L2 归一化的向量矩阵（get_embeddings 的输出）
         eps_range: eps候选值列表
         min_samples_range: min_samples候选值列表（为None时自动生成）
+        sample_weight: 每个向量代表的文本条数（近似重复合并后的权重）
 
     返回:
         (最优eps, 最优min_samples)
@@ -330,8 +726,8 @@ def optimize_clustering_params(
 
     logger.info(f"开始参数优化：尝试 {len(eps_range)} × {len(min_samples_range)} = {len(eps_range) * len(min_samples_range)} 组参数")
 
-    # 预计算距离矩阵（避免重复计算）
-    distance_matrix = cosine_distances(embeddings)
+    # 按最大 eps 预计算一次稀疏邻居图，较小的 eps 由 DBSCAN 在图上再过滤
+    distance_matrix = radius_neighbor_graph(embeddings, max(eps_range))
 
     best_score = -1
     best_params = (0.25, 3)
@@ -341,8 +737,7 @@ def optimize_clustering_params(
         for min_samples in min_samples_range:
             try:
                 # 执行聚类
-                dbscan = DBSCAN(eps=eps, min_samples=min_samples, metric='precomputed')
-                labels = dbscan.fit_predict(distance_matrix)
+                labels = dbscan_on_graph(distance_matrix, eps, min_samples, sample_weight)
 
                 # 统计聚类数量
                 n_clusters = len(set(labels)) - (1 if -1 in labels else 0)
@@ -396,9 +791,17 @@ class SemanticClusterer:
         self.eps = eps
         self.min_samples = min_samples
 
-    def cluster(self, embeddings: np.ndarray, texts: List[str], scores: Optional[List[float]] = None) -> List[Dict]:
+    def cluster(
+        self,
+        embeddings: np.ndarray,
+        texts: List[str],
+        scores: Optional[List[float]] = None,
+        weights: Optional[List[int]] = None
+    ) -> List[Dict]:
         """
         执行 DBSCAN 聚类
+        embeddings 需为 L2 归一化的向量（get_embeddings 的输出）
+        weights 为每条文本合并的近似重复条数，作为 DBSCAN 的 sample_weight，并计入聚类大小
 
         返回格式:
         [
@@ -415,26 +818,28 @@ class SemanticClusterer:
 
         if scores is None:
             scores = [1.0] * len(texts)
+        if weights is None:
+            weights = [1] * len(texts)
+        weights_arr = np.asarray(weights, dtype=np.int64)
 
-        # 计算余弦距离矩阵
-        logger.info("正在计算余弦距离矩阵...")
-        distance_matrix = cosine_distances(embeddings)
+        # 计算 eps 以内的稀疏余弦邻居图
+        logger.info("正在计算余弦邻居图...")
+        distance_matrix = radius_neighbor_graph(embeddings, self.eps)
 
         # DBSCAN 聚类
         logger.info(f"正在执行 DBSCAN 聚类 (eps={self.eps}, min_samples={self.min_samples})...")
-        dbscan = DBSCAN(eps=self.eps, min_samples=self.min_samples, metric='precomputed')
-        labels = dbscan.fit_predict(distance_matrix)
+        labels = dbscan_on_graph(distance_matrix, self.eps, self.min_samples, weights_arr)
 
         # 统计聚类结果
-        unique_labels = set(labels)
-        n_clusters = len([l for l in unique_labels if l != -1])
-        n_noise = list(labels).count(-1)
+        noise_mask = labels == -1
+        n_noise = int(noise_mask.sum())
+        n_clusters = len(np.unique(labels)) - (1 if n_noise else 0)
         logger.info(f"聚类完成: {n_clusters} 个聚类, {n_noise} 个噪音点")
 
         # 计算聚类质量指标（仅当有多个聚类时）
         if n_clusters > 1:
             # 过滤掉噪音点用于评估
-            non_noise_mask = labels != -1
+            non_noise_mask = ~noise_mask
             if np.sum(non_noise_mask) > n_clusters:
                 try:
                     # Silhouette分数：-1到1，越接近1越好
@@ -467,53 +872,41 @@ class SemanticClusterer:
         else:
             logger.warning("聚类数量过少，无法计算质量指标")
 
-        # 构建聚类结果
-        clusters = {}
-        for idx, label in enumerate(labels):
-            if label == -1:  # 噪音点单独处理
-                continue
-            if label not in clusters:
-                clusters[label] = {
-                    'indices': [],
-                    'texts': [],
-                    'scores': []
-                }
-            clusters[label]['indices'].append(idx)
-            clusters[label]['texts'].append(texts[idx])
-            clusters[label]['scores'].append(scores[idx])
-
-        # 为每个聚类找出代表性文本
-        results = []
-        for label, cluster_data in clusters.items():
-            indices = cluster_data['indices']
-            cluster_texts = cluster_data['texts']
-            cluster_scores = cluster_data['scores']
-
-            # 计算聚类中心
-            cluster_embeddings = embeddings[indices]
-            centroid = np.mean(cluster_embeddings, axis=0)
-
-            # 找到距离中心最近的文本
-            distances_to_center = cosine_distances([centroid], cluster_embeddings)[0]
+        # 构建聚类结果：按标签稳定排序一次，噪音点（-1）排在最前单独处理，
+        # 其余每个聚类是排序后的一段连续区间
+        order = np.argsort(labels, kind='stable')
+        members = order[n_noise:]
+        _, starts = np.unique(labels[members], return_index=True)
+        ends = np.append(starts[1:], len(members))
 
-            # 综合距离和质量分数选择代表文本
-            combined_scores = []
-            for i, (dist, score) in enumerate(zip(distances_to_center, cluster_scores)):
-                # 距离越小越好（取反），分数越高越好
-                combined = -dist + score * 0.3
-                combined_scores.append(combined)
-
-            best_idx = np.argmax(combined_scores)
-            representative_text = cluster_texts[best_idx]
-
-            # 去重后的文本列表
-            unique_texts = list(dict.fromkeys(cluster_texts))
-
-            results.append({
-                'representative_text': representative_text,
-                'size': len(unique_texts),
-                'texts': unique_texts
-            })
+        results = []
+        if len(members):
+            # 所有聚类中心一次算出：按区间求和后归一化
+            member_embeddings = embeddings[members]
+            centroids = np.add.reduceat(member_embeddings, starts, axis=0)
+            centroids /= np.linalg.norm(centroids, axis=1, keepdims=True).clip(min=1e-12)
+
+            # 每个点到所属聚类中心的距离（逐行点积，一次完成）
+            group_ids = np.repeat(np.arange(len(starts)), ends - starts)
+            distances_to_center = 1.0 - np.einsum('ij,ij->i', member_embeddings, centroids[group_ids])
+
+            # 综合距离和质量分数选择代表文本：距离越小越好（取反），分数越高越好
+            combined_scores = -distances_to_center + np.asarray(scores)[members] * 0.3
+
+            # 按每个聚类首个成员的下标排列，与逐条遍历时的出现顺序一致
+            for g in np.argsort(members[starts], kind='stable'):
+                s, e = starts[g], ends[g]
+                best_idx = s + np.argmax(combined_scores[s:e])
+                representative_text = texts[members[best_idx]]
+
+                # 去重后的文本列表；大小按权重计入被合并的近似重复
+                unique_texts = list(dict.fromkeys(texts[i] for i in members[s:e].tolist()))
+
+                results.append({
+                    'representative_text': representative_text,
+                    'size': int(weights_arr[members[s:e]].sum()),
+                    'texts': unique_texts
+                })
 
         # 按聚类大小排序
         results.sort(key=lambda x: x['size'], reverse=True)
@@ -527,8 +920,7 @@ class SemanticClusterer:
             logger.info(f"过滤掉 {removed_count} 个过小聚类（size < {min_cluster_size}），保留 {len(filtered_results)} 个有意义的聚类")
 
         # 记录被过滤的高质量噪音点数量（用于调试）
-        noise_indices = [i for i, label in enumerate(labels) if label == -1]
-        high_quality_noise = sum(1 for idx in noise_indices if scores[idx] >= 2.0)
+        high_quality_noise = int(weights_arr[noise_mask & (np.asarray(scores) >= 2.0)].sum())
         if high_quality_noise > 0:
             logger.info(f"过滤掉 {high_quality_noise} 个高质量但未聚类的文本（可考虑放宽参数以获得更多聚类）")
 
@@ -560,7 +952,7 @@ def process_texts(
     # 1. 数据清洗
     logger.info("开始数据清洗...")
     cleaner = DataCleaner(min_length=min_length)
-    cleaned_texts, scores = cleaner.clean(texts)
+    cleaned_texts, scores, weights = cleaner.clean(texts)
 
     if not cleaned_texts:
         logger.warning("清洗后没有有效文本")
@@ -569,17 +961,20 @@ def process_texts(
     # 2. 获取 Embedding
     logger.info("开始获取 Embedding...")
     embedder = ZhipuEmbedding()
-    embeddings = embedder.get_embeddings(cleaned_texts)
+    try:
+        embeddings = embedder.get_embeddings(cleaned_texts)
+    finally:
+        embedder.close()
 
     # 3. 参数优化（如果启用）
     if auto_optimize:
         logger.info("启用参数自动优化...")
-        eps, min_samples = optimize_clustering_params(embeddings)
+        eps, min_samples = optimize_clustering_params(embeddings, sample_weight=weights)
     else:
         # 动态计算 eps（如果未指定）
         if eps is None:
-            # 根据数据量自适应调整 eps
-            data_size = len(cleaned_texts)
+            # 根据数据量自适应调整 eps（按合并前的文本条数）
+            data_size = sum(weights)
             if data_size < 20:
                 eps = 0.45  # 极小数据集：非常宽松
                 logger.info(f"极小数据集({data_size}条)，使用较大eps={eps}以确保能形成聚类")
@@ -596,7 +991,7 @@ def process_texts(
         # 动态计算 min_samples（如果未指定）
         if min_samples is None:
             # 根据数据量自适应：至少3个样本以保证聚类有意义
-            data_size = len(cleaned_texts)
+            data_size = sum(weights)
             if data_size < 15:
                 min_samples = 3  # 极小数据集：仍然保持3，避免2条就成簇
             elif data_size < 50:
@@ -610,7 +1005,7 @@ def process_texts(
     # 4. DBSCAN 聚类
     logger.info("开始语义聚类...")
     clusterer = SemanticClusterer(eps=eps, min_samples=min_samples)
-    clusters = clusterer.cluster(embeddings, cleaned_texts, scores)
+    clusters = clusterer.cluster(embeddings, cleaned_texts, scores, weights)
 
     logger.info(f"处理完成，共 {len(clusters)} 个聚类")
     return clusters
@@ -633,10 +1028,10 @@ def main():
 
     # 读取输入
     if args.stdin:
-        input_data = json.loads(sys.stdin.read())
+        input_data = _json_loads(sys.stdin.buffer.read())
     elif args.input:
-        with open(args.input, 'r', encoding='utf-8') as f:
-            input_data = json.load(f)
+        with open(args.input, 'rb') as f:
+            input_data = _json_loads(f.read())
     else:
         parser.error("请指定 --input 或 --stdin")
         return
@@ -672,14 +1067,15 @@ def main():
         }
 
     # 输出结果
-    result_json = json.dumps(output, ensure_ascii=False, indent=2)
+    result_json = _json_dumps(output, indent=True)
 
     if args.output:
-        with open(args.output, 'w', encoding='utf-8') as f:
+        with open(args.output, 'wb') as f:
             f.write(result_json)
         logger.info(f"结果已保存到 {args.output}")
     else:
-        print(result_json)
+        sys.stdout.buffer.write(result_json + b'\n')
+        sys.stdout.buffer.flush()
 
 
 if __name__ == '__main__':
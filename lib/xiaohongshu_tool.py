@@ -11,15 +11,16 @@ import time
 import os
 import argparse
 import logging
+import re
 import sys
 from datetime import datetime
-from urllib.parse import urlparse, parse_qs
+from urllib.parse import unquote_plus
 from collections.abc import Mapping
-from typing import Dict, Optional
+from types import MappingProxyType
+from typing import Dict, List, Optional
 import random
 import execjs
 from numbers import Integral
-from typing import Iterable
 from curl_cffi.requests import AsyncSession, Response
 
 # 设置输出编码为UTF-8
@@ -32,17 +33,153 @@ if sys.platform.startswith('win'):
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# 可选：orjson序列化/解析更快（首页/搜索响应有几十KB），未安装时回退到标准库json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# 可选：pysimdjson 用SIMD指令直接解析响应字节，安装后优先使用
+try:
+    import simdjson
+    _simdjson_parser = simdjson.Parser()
+except ImportError:
+    _simdjson_parser = None
+
+# 可选：mini-racer 在进程内运行V8执行签名JS，省去每次签名都启动Node子进程；未安装时回退到 execjs
+try:
+    from py_mini_racer import MiniRacer
+except ImportError:
+    MiniRacer = None
+
+# 可选：uvloop 事件循环（libuv实现，不支持Windows），未安装时使用 asyncio 默认事件循环
+uvloop = None
+if not sys.platform.startswith('win'):
+    try:
+        import uvloop
+    except ImportError:
+        pass
+
+# 裸V8没有浏览器/Node提供的 btoa，签名JS依赖它，在 mini-racer 上下文中补齐（仅支持 Latin-1，与原生一致）
+_JS_BTOA_POLYFILL = r'''
+if (typeof globalThis.btoa === 'undefined') {
+    globalThis.btoa = function (input) {
+        var chars = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/';
+        var str = String(input);
+        var output = '';
+        for (var i = 0; i < str.length; i += 3) {
+            var a = str.charCodeAt(i), b = str.charCodeAt(i + 1), c = str.charCodeAt(i + 2);
+            if (a > 255 || b > 255 || c > 255) {
+                throw new Error('InvalidCharacterError: Invalid character');
+            }
+            var n = (a << 16) | ((b || 0) << 8) | (c || 0);
+            output += chars.charAt(n >> 18 & 63) + chars.charAt(n >> 12 & 63)
+                + (i + 1 < str.length ? chars.charAt(n >> 6 & 63) : '=')
+                + (i + 2 < str.length ? chars.charAt(n & 63) : '=');
+        }
+        return output;
+    };
+}
+'''
+
+
+def _task_cancelling(task: asyncio.Task) -> bool:
+    """任务是否已被请求取消但尚未结束（Task.cancelling 需要 Python 3.11+，更早版本视为否）"""
+    cancelling = getattr(task, 'cancelling', None)
+    return bool(cancelling and cancelling())
+
+
+def _json_dumps(obj) -> bytes:
+    """序列化请求体为紧凑的UTF-8 JSON字节（两种实现输出一致）"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def _json_loads(data):
+    """解析JSON（bytes或str），依次优先 simdjson、orjson、标准库"""
+    if _simdjson_parser is not None and isinstance(data, bytes):
+        # recursive=True 直接转成 dict/list；解析器复用，返回的是独立的Python对象
+        return _simdjson_parser.parse(data, recursive=True)
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+# 签名JS文件路径
+_JS_PATH = os.path.join(os.path.dirname(__file__), "xhs_mcp", "api", "xhsvm.js")
+
+# 获取笔记详情接口所需的 x-s-common 请求头（固定值）
+_XS_COMMON = '2UQAPsHCPUIjqArjwjHjNsQhPsHCH0rjNsQhPaHCH0c1PahIHjIj2eHjwjQ+GnPW/MPjNsQhPUHCHdYiqUMIGUM78nHjNsQh+sHCH0c1+0H1PUHVHdWMH0ijP/DAP9L9P/DhPerUJoL72nIM+9Qf8fpC2fHA8n4Fy0m1Gnpd4n+I+BHAPeZIPerMw/GhPjHVHdW9H0il+Ac7weZ7PAWU+/LUNsQh+UHCHSY8pMRS2LkCGp4D4pLAndpQyfRk/Sz8yLleadkYp9zMpDYV4Mk/a/8QJf4EanS7ypSGcd4/pMbk/9St+BbH/gz0zFMF8eQnyLSk49S0Pfl1GflyJB+1/dmjP0zk/9SQ2rSk49S0zFGMGDqEybkea/8QJLkx/fkb+pkgpfYwpFSE/p4Q4MkLp/+ypMph/dkDJpkTp/p+pB4C/F4ayDETn/Qw2fPI/Szz4MSgngkwPSk3nSzwyDRrp/myySLF/dkp2rMra/QypMDlnnM8PrEL/fMypMLA/L4aybkLz/p+pMQT/LzQ+LRLc/+8yfzVnD4+2bkLzflwzbQx/nktJLELngY+yfVMngktJrEr/gY+ySrF/nkm2DFUnfkwJL83nD4zPFMgz/+Ozrk3/Lz8+pkrafkyprbE/M4p+pkrngYypbphnnM+PMkxcg482fYxnD4p+rExyBMyzFFl/dk0PFMCp/pOzrFM/Dz04FECcg4yzBzingkz+LMCafS+pMQi/fM8PDEx/gYyzFEinfM8PLETpg4wprDM/0QwJbSgzg4OpBTCnDz+4MSxy74wySQx/L4tJpkLngSwzB4hn/QbPrErL/zwJLMh/gkp2SSLa/bwzFEknpzz2LMx/gSwpMDA//Qz4Mkr/fMwzrLA/nMzPSkTnfk+2fVM/pzpPMkrzfY8pFDInS4ayLELafSOzbb7npzDJpkLy7kwzBl3/gkDyDRL87Y+yDMC/DzaJpkrLg4+PSkknDzQ4FEoL/zwpBVUngkVyLMoL/m8JLp7/nMyJLMC8BTwpbphnDziyLExzgY+yDEinpzz2pkTpgk8yDbC/0QByFMTn/zOzbDl/LziJpSLcgYypFDlnnMQPFMC8A+ypBVl/gk32pkLL/++zFk3anhIOaHVHdWhH0ija/PhqDYD87+xJ7mdag8Sq9zn494QcUT6aLpPJLQy+nLApd4G/B4BprShLA+jqg4bqD8S8gYDPBp3Jf+m2DMBnnEl4BYQyrkSL9zL2obl49zQ4DbApFQ0yo4c4ozdJ/c9aMpC2rSiPoPI/rTAydb7JdD7zbkQ4fRA2BQcydSy4LbQyrTSzBr7q98ppbztqgzat7b7cgmDqrEQc9YT/Sqha7kn4M+Qc94Sy7pFao4l4FzQzL8laLL6qMzQnfSQ2oQ+ag8d8nzl4MH3+7mc2Skwq9z8P9pfqgzmanTw8/+n494lqgzIqopF2rTC87Plp7mSaL+npFSiL/Z6LozzaM87cLDAn0Q6JnzSygb78DSecnpLpdzUaLL3tFSbJnE08fzSyf4CngQ6J7+fqg4OnS468nzPzrzsJ94AySkIcDSha7+DpdzYanT98n8l4MQj/LlQz9GFcDDA+7+hqgzbNM4O8gWIJezQybbAaLLhtFYd/B8Q2rpAwrMVJLS3G98jLo4/aL+lpAYdad+8nLRAyMm7LDDAa9pfcDbS8eZFtFSbPo+hGfMr4bm7yDS3a9LA878ApfF6qAbc4rEINFRSydp7pDS9zn4Ccg8SL7p74Dlsad+/4gq3a/PhJDDAwepT4g4oJpm7afRmy/zNpFESzBqM8/8l49+QyBpAzeq98/bCL0SQzLEA8DMSqA8xG9lQyFESPMmFprSkG0mELozIaSm78rSh8npkpdzBaLLIqMzM4M+QysRAzopFL74M47+6pdzGag8HpLDAagrFGgmaLLzdqA+l4r+Q2BM+anTtqFzl4obPzsTYJAZIq9cIaB8QygQsz7pFJ7QM49lQ4DESpSmFnaTBa9pkGFEAyLSC8LSi87P9JA8ApopFqURn47bQPFbSPob7yrS389L9q7pPaL+D8pSA4fpfLoz+a/P7qM8M47pOcLclanS84FSh8BL92DkA2bSdqFzyP9prpd4YanW3pFSezfV6Lo41a/+rpDSkafpnagk+2/498n8n4AQQyMZ6JSm7anMU8nLIaLbA8dpF8Lll4rRQy9D9aLpz+bmn4oSOqg4Ca/P6q9kQ+npkLo4lqgbFJDSi+ezA4gc9a/+ynSkSzFkQynzAzeqAq9k68Bp34gqhaopFtFSknSbQP9zA+dpFpDSkJ9p8zrpfag8aJ9RgL9+Qzp+SaL+m8/bl4Mq6pdc3/S8FJrShLr+QzLbAnnLI8/+l4A+IGdQeag8c8AYl4sTOLoz+anTUarS3JpSQPMQPagGI8nzj+g+/L7i94M8FnDDAap4Y4g4YGdp7pFSiPBp3+7QGanSccLldPBprLozk8gpFJnRCLB+7+9+3anTzyomM47pQyFRAPnF3GFS3LfRFpd4FagY/pfMl4sTHpdzNaL+/aLDAy9VjNsQhwaHCP/HlweGM+/Z9PjIj2erIH0iU+emR'
+
+# 笔记链接解析，结果与 urlparse + parse_qs 一致：
+# note_id 取路径（跳过scheme和域名）最后一段，去掉 ;params；
+# xsec_token 只在 # 之前的查询串中查找第一个非空值，需按表单编码解码
+_URL_NOTE_ID_RE = re.compile(
+    r'^(?:[a-zA-Z][a-zA-Z0-9+.-]*:)?(?://[^/?#]*)?[^?#]*?([^/?#;]*)(?:;[^/?#]*)?(?:[?#]|$)'
+)
+_URL_XSEC_TOKEN_RE = re.compile(r'^[^?#]*\?(?:[^#]*?&)??xsec_token=([^&#]+)')
+
+# Base36编码字符表，以及两位一组的查表（每次大整数divmod产出两位）
+_ALPHABET = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+_ALPHABET_PAIRS = tuple(a + b for a in _ALPHABET for b in _ALPHABET)
+
+# 以下请求头和请求体模板每次调用都相同，只在模块加载时构造一次；使用时先复制再填充
+_DEFAULT_HEADERS = MappingProxyType({
+    'content-type': 'application/json;charset=UTF-8',
+    'user-agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/135.0.0.0 Safari/537.36',
+})
+
+# 与 json.dumps(["jpg", "webp", "avif"], separators=(",", ":")) 结果一致
+_IMAGE_FORMATS_JSON = '["jpg","webp","avif"]'
+
+_SEARCH_NOTES_DATA = {
+    "keyword": "",
+    "page": 1,
+    "page_size": 20,
+    "search_id": "",
+    "sort": "general",
+    "note_type": 0,
+    "ext_flags": [],
+    "geo": "",
+    "image_formats": _IMAGE_FORMATS_JSON
+}
+
+_HOME_FEED_DATA = {
+    "category": "homefeed_recommend",
+    "cursor_score": "",
+    "image_formats": _IMAGE_FORMATS_JSON,
+    "need_filter_image": False,
+    "need_num": 8,
+    "num": 18,
+    "note_index": 33,
+    "refresh_type": 1,
+    "search_key": "",
+    "unread_begin_note_id": "",
+    "unread_end_note_id": "",
+    "unread_note_count": 0
+}
+
 
 class XhsApi:
     """小红书API封装类"""
 
+    # 编译好的签名JS上下文，进程内所有实例共用；JS文件被修改后自动重新编译
+    _js_ctx = None
+    _js_mtime = None
+
     def __init__(self, cookie: str):
         self._cookie = cookie
+        # cookie在运行期间不变，只解析一次
+        self._cookie_dict = self._parse_cookie(cookie)
         self._base_url = "https://edith.xiaohongshu.com"
-        self._headers = {
-            'content-type': 'application/json;charset=UTF-8',
-            'user-agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/135.0.0.0 Safari/537.36',
-        }
+        self._headers = dict(_DEFAULT_HEADERS)
+        # 所有请求共用一个会话，复用TLS连接和HTTP/2多路复用；首次请求时创建
+        self._session: Optional[AsyncSession] = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
 
     def init_session(self):
         """初始化会话"""
@@ -51,50 +188,63 @@ class XhsApi:
             impersonate="chrome124"
         )
 
+    def _get_session(self) -> AsyncSession:
+        """获取共用会话（懒加载）"""
+        if self._session is None:
+            self._session = self.init_session()
+        return self._session
+
+    async def close(self):
+        """关闭共用会话"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
     def _parse_cookie(self, cookie: str) -> Dict:
         """解析cookie字符串为字典"""
-        cookie_dict = {}
-        if cookie:
-            pairs = cookie.split(';')
-            for pair in pairs:
-                if '=' in pair:
-                    key, value = pair.strip().split('=', 1)
-                    cookie_dict[key] = value
-        return cookie_dict
+        if not cookie:
+            return {}
+        return dict(pair.strip().split('=', 1) for pair in cookie.split(';') if '=' in pair)
 
     async def request(self, uri: str, session=None, method="GET", headers=None, params=None, data=None) -> Dict:
         """发送HTTP请求"""
         if session is None:
-            session = self.init_session()
+            session = self._get_session()
         if headers is None:
             headers = {}
 
+        # 请求体自行序列化后以字节发送，不走 curl_cffi 内部的标准库 json.dumps
+        body = None
+        if data is not None:
+            body = _json_dumps(data)
+            headers = {'content-type': _DEFAULT_HEADERS['content-type'], **headers}
+
         response: Response = await session.request(
             method=method,
             url=f"{self._base_url}{uri}",
             params=params,
-            json=data,
-            cookies=self._parse_cookie(self._cookie),
+            data=body,
+            cookies=self._cookie_dict,
             quote=False,
-            stream=True,
             headers=headers
         )
 
-        content = await response.acontent()
-        return json.loads(content)
+        return _json_loads(response.content)
 
-    def base36encode(self, number: Integral, alphabet: Iterable[str] = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ') -> str:
+    def base36encode(self, number: Integral) -> str:
         """Base36编码"""
-        base36 = ''
-        alphabet = ''.join(alphabet)
         sign = '-' if number < 0 else ''
         number = abs(number)
 
-        while number:
-            number, i = divmod(number, len(alphabet))
-            base36 = alphabet[i] + base36
+        # 逐组追加后整体反转，避免每次在字符串头部拼接；36*36进制使大整数除法次数减半
+        chars = []
+        while number >= 36:
+            number, i = divmod(number, 1296)
+            chars.append(_ALPHABET_PAIRS[i])
+        if number:
+            chars.append(_ALPHABET[number])
 
-        return sign + (base36 or alphabet[0])
+        return sign + (''.join(reversed(chars)) or _ALPHABET[0])
 
     def search_id(self):
         """生成搜索ID"""
@@ -102,18 +252,40 @@ class XhsApi:
         t = int(random.uniform(0, 2147483646))
         return self.base36encode((e + t))
 
+    @classmethod
+    def _get_js_ctx(cls):
+        """获取签名JS上下文（首次调用或文件变化时才读取并编译）"""
+        try:
+            mtime = os.path.getmtime(_JS_PATH)
+        except OSError:
+            raise FileNotFoundError(f"JS文件不存在: {_JS_PATH}")
+
+        if cls._js_ctx is None or cls._js_mtime != mtime:
+            with open(_JS_PATH, 'r', encoding='utf-8') as f:
+                js_code = f.read()
+            cls._js_ctx = cls._compile_js(js_code)
+            cls._js_mtime = mtime
+
+        return cls._js_ctx
+
+    @staticmethod
+    def _compile_js(js_code: str):
+        """编译签名JS：优先进程内V8（mini-racer），否则用 execjs（默认每次调用启动Node）"""
+        if MiniRacer is not None:
+            ctx = MiniRacer()
+            ctx.eval(_JS_BTOA_POLYFILL)
+            ctx.eval(js_code)
+            return ctx
+        return execjs.compile(js_code)
+
     def get_xs_xt(self, uri, data, cookie):
         """获取x-s和x-t签名参数"""
-        current_directory = os.path.dirname(__file__)
-        js_file_path = os.path.join(current_directory, "xhs_mcp", "api", "xhsvm.js")
+        return self._get_js_ctx().call('GetXsXt', uri, data, cookie)
 
-        if not os.path.exists(js_file_path):
-            raise FileNotFoundError(f"JS文件不存在: {js_file_path}")
-
-        with open(js_file_path, 'r', encoding='utf-8') as f:
-            js_code = f.read()
-
-        return execjs.compile(js_code).call('GetXsXt', uri, data, cookie)
+    def _signed_headers(self, uri: str, data: Dict) -> Dict:
+        """在默认请求头基础上加入 x-s/x-t 签名，返回新的dict"""
+        xsxt = _json_loads(self.get_xs_xt(uri, data, self._cookie))
+        return {**_DEFAULT_HEADERS, 'x-s': xsxt['X-s'], 'x-t': str(xsxt['X-t'])}
 
     async def get_me(self) -> Dict:
         """获取用户信息，用于检测cookie有效性"""
@@ -122,43 +294,20 @@ class XhsApi:
 
     async def search_notes(self, keywords: str, limit: int = 20) -> Dict:
         """搜索笔记"""
+        # 覆盖已有键不改变字段顺序
         data = {
+            **_SEARCH_NOTES_DATA,
             "keyword": keywords,
-            "page": 1,
             "page_size": limit,
             "search_id": self.search_id(),
-            "sort": "general",
-            "note_type": 0,
-            "ext_flags": [],
-            "geo": "",
-            "image_formats": json.dumps(["jpg", "webp", "avif"], separators=(",", ":"))
         }
         return await self.request("/api/sns/web/v1/search/notes", method="POST", data=data)
 
     async def home_feed(self) -> Dict:
         """获取首页推荐"""
-        data = {
-            "category": "homefeed_recommend",
-            "cursor_score": "",
-            "image_formats": json.dumps(["jpg", "webp", "avif"], separators=(",", ":")),
-            "need_filter_image": False,
-            "need_num": 8,
-            "num": 18,
-            "note_index": 33,
-            "refresh_type": 1,
-            "search_key": "",
-            "unread_begin_note_id": "",
-            "unread_end_note_id": "",
-            "unread_note_count": 0
-        }
+        data = dict(_HOME_FEED_DATA)
         uri = "/api/sns/web/v1/homefeed"
-        headers = {
-            'content-type': 'application/json;charset=UTF-8',
-            'user-agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/135.0.0.0 Safari/537.36',
-        }
-        xsxt = json.loads(self.get_xs_xt(uri, data, self._cookie))
-        headers['x-s'] = xsxt['X-s']
-        headers['x-t'] = str(xsxt['X-t'])
+        headers = self._signed_headers(uri, data)
         return await self.request(uri, method="POST", headers=headers, data=data)
 
     async def get_note_content(self, note_id: str, xsec_token: str) -> Dict:
@@ -171,14 +320,8 @@ class XhsApi:
             "xsec_token": xsec_token
         }
         uri = "/api/sns/web/v1/feed"
-        headers = {
-            'content-type': 'application/json;charset=UTF-8',
-            'user-agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/135.0.0.0 Safari/537.36',
-        }
-        xsxt = json.loads(self.get_xs_xt(uri, data, self._cookie))
-        headers['x-s'] = xsxt['X-s']
-        headers['x-t'] = str(xsxt['X-t'])
-        headers['x-s-common'] = '2UQAPsHCPUIjqArjwjHjNsQhPsHCH0rjNsQhPaHCH0c1PahIHjIj2eHjwjQ+GnPW/MPjNsQhPUHCHdYiqUMIGUM78nHjNsQh+sHCH0c1+0H1PUHVHdWMH0ijP/DAP9L9P/DhPerUJoL72nIM+9Qf8fpC2fHA8n4Fy0m1Gnpd4n+I+BHAPeZIPerMw/GhPjHVHdW9H0il+Ac7weZ7PAWU+/LUNsQh+UHCHSY8pMRS2LkCGp4D4pLAndpQyfRk/Sz8yLleadkYp9zMpDYV4Mk/a/8QJf4EanS7ypSGcd4/pMbk/9St+BbH/gz0zFMF8eQnyLSk49S0Pfl1GflyJB+1/dmjP0zk/9SQ2rSk49S0zFGMGDqEybkea/8QJLkx/fkb+pkgpfYwpFSE/p4Q4MkLp/+ypMph/dkDJpkTp/p+pB4C/F4ayDETn/Qw2fPI/Szz4MSgngkwPSk3nSzwyDRrp/myySLF/dkp2rMra/QypMDlnnM8PrEL/fMypMLA/L4aybkLz/p+pMQT/LzQ+LRLc/+8yfzVnD4+2bkLzflwzbQx/nktJLELngY+yfVMngktJrEr/gY+ySrF/nkm2DFUnfkwJL83nD4zPFMgz/+Ozrk3/Lz8+pkrafkyprbE/M4p+pkrngYypbphnnM+PMkxcg482fYxnD4p+rExyBMyzFFl/dk0PFMCp/pOzrFM/Dz04FECcg4yzBzingkz+LMCafS+pMQi/fM8PDEx/gYyzFEinfM8PLETpg4wprDM/0QwJbSgzg4OpBTCnDz+4MSxy74wySQx/L4tJpkLngSwzB4hn/QbPrErL/zwJLMh/gkp2SSLa/bwzFEknpzz2LMx/gSwpMDA//Qz4Mkr/fMwzrLA/nMzPSkTnfk+2fVM/pzpPMkrzfY8pFDInS4ayLELafSOzbb7npzDJpkLy7kwzBl3/gkDyDRL87Y+yDMC/DzaJpkrLg4+PSkknDzQ4FEoL/zwpBVUngkVyLMoL/m8JLp7/nMyJLMC8BTwpbphnDziyLExzgY+yDEinpzz2pkTpgk8yDbC/0QByFMTn/zOzbDl/LziJpSLcgYypFDlnnMQPFMC8A+ypBVl/gk32pkLL/++zFk3anhIOaHVHdWhH0ija/PhqDYD87+xJ7mdag8Sq9zn494QcUT6aLpPJLQy+nLApd4G/B4BprShLA+jqg4bqD8S8gYDPBp3Jf+m2DMBnnEl4BYQyrkSL9zL2obl49zQ4DbApFQ0yo4c4ozdJ/c9aMpC2rSiPoPI/rTAydb7JdD7zbkQ4fRA2BQcydSy4LbQyrTSzBr7q98ppbztqgzat7b7cgmDqrEQc9YT/Sqha7kn4M+Qc94Sy7pFao4l4FzQzL8laLL6qMzQnfSQ2oQ+ag8d8nzl4MH3+7mc2Skwq9z8P9pfqgzmanTw8/+n494lqgzIqopF2rTC87Plp7mSaL+npFSiL/Z6LozzaM87cLDAn0Q6JnzSygb78DSecnpLpdzUaLL3tFSbJnE08fzSyf4CngQ6J7+fqg4OnS468nzPzrzsJ94AySkIcDSha7+DpdzYanT98n8l4MQj/LlQz9GFcDDA+7+hqgzbNM4O8gWIJezQybbAaLLhtFYd/B8Q2rpAwrMVJLS3G98jLo4/aL+lpAYdad+8nLRAyMm7LDDAa9pfcDbS8eZFtFSbPo+hGfMr4bm7yDS3a9LA878ApfF6qAbc4rEINFRSydp7pDS9zn4Ccg8SL7p74Dlsad+/4gq3a/PhJDDAwepT4g4oJpm7afRmy/zNpFESzBqM8/8l49+QyBpAzeq98/bCL0SQzLEA8DMSqA8xG9lQyFESPMmFprSkG0mELozIaSm78rSh8npkpdzBaLLIqMzM4M+QysRAzopFL74M47+6pdzGag8HpLDAagrFGgmaLLzdqA+l4r+Q2BM+anTtqFzl4obPzsTYJAZIq9cIaB8QygQsz7pFJ7QM49lQ4DESpSmFnaTBa9pkGFEAyLSC8LSi87P9JA8ApopFqURn47bQPFbSPob7yrS389L9q7pPaL+D8pSA4fpfLoz+a/P7qM8M47pOcLclanS84FSh8BL92DkA2bSdqFzyP9prpd4YanW3pFSezfV6Lo41a/+rpDSkafpnagk+2/498n8n4AQQyMZ6JSm7anMU8nLIaLbA8dpF8Lll4rRQy9D9aLpz+bmn4oSOqg4Ca/P6q9kQ+npkLo4lqgbFJDSi+ezA4gc9a/+ynSkSzFkQynzAzeqAq9k68Bp34gqhaopFtFSknSbQP9zA+dpFpDSkJ9p8zrpfag8aJ9RgL9+Qzp+SaL+m8/bl4Mq6pdc3/S8FJrShLr+QzLbAnnLI8/+l4A+IGdQeag8c8AYl4sTOLoz+anTUarS3JpSQPMQPagGI8nzj+g+/L7i94M8FnDDAap4Y4g4YGdp7pFSiPBp3+7QGanSccLldPBprLozk8gpFJnRCLB+7+9+3anTzyomM47pQyFRAPnF3GFS3LfRFpd4FagY/pfMl4sTHpdzNaL+/aLDAy9VjNsQhwaHCP/HlweGM+/Z9PjIj2erIH0iU+emR'
+        headers = self._signed_headers(uri, data)
+        headers['x-s-common'] = _XS_COMMON
 
         return await self.request(uri, method="POST", headers=headers, data=data)
 
@@ -202,21 +345,48 @@ class XhsApi:
             "content": comment,
             "at_users": []
         }
-        headers = {
-            'content-type': 'application/json;charset=UTF-8',
-            'user-agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/135.0.0.0 Safari/537.36',
-        }
-        xsxt = json.loads(self.get_xs_xt(uri, data, self._cookie))
-        headers['x-s'] = xsxt['X-s']
-        headers['x-t'] = str(xsxt['X-t'])
+        headers = self._signed_headers(uri, data)
         return await self.request(uri, method="POST", headers=headers, data=data)
 
 
 class XiaohongshuTool:
     """小红书工具主类"""
 
+    # cookie检测结果的缓存时间（秒），批量请求失败时不必每次都重新检测
+    COOKIE_STATUS_TTL = 30
+
     def __init__(self, cookie: str):
         self.api = XhsApi(cookie)
+        self._cookie_status: Optional[str] = None
+        self._cookie_status_ts = 0.0
+        # 进行中的检测，并发调用方共用；_cookie_waiters 为仍在等待它的调用方数量
+        self._cookie_probe: Optional[asyncio.Task] = None
+        self._cookie_waiters = 0
+
+    async def __aenter__(self):
+        await self.api.__aenter__()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def close(self):
+        if self._cookie_probe is not None:
+            self._cookie_probe.cancel()
+            self._cookie_probe = None
+        await self.api.close()
+
+    async def _request_with_cookie_check(self, coro):
+        """
+        发起主请求的同时在后台检测cookie，失败分支无需再串行等待一次检测
+        返回 (响应, 检测任务)；调用方解析成功时取消任务，失败时 await 任务取得cookie状态
+        """
+        cookie_task = asyncio.create_task(self.check_cookie())
+        try:
+            return await coro, cookie_task
+        except BaseException:
+            cookie_task.cancel()
+            raise
 
     def get_note_id_token(self, url: str = None, note_ids: str = None):
         """从URL或note_ids提取note_id和xsec_token"""
@@ -225,42 +395,70 @@ class XiaohongshuTool:
             xsec_token = note_ids[24:]
             return {"note_id": note_id, "xsec_token": xsec_token}
 
-        parsed_url = urlparse(url)
-        query_params = parse_qs(parsed_url.query)
-
-        note_id = parsed_url.path.split('/')[-1]
-        xsec_token = None
-        xsec_token_list = query_params.get('xsec_token', [None])
-        if len(xsec_token_list) > 0:
-            xsec_token = xsec_token_list[0]
+        note_id = _URL_NOTE_ID_RE.match(url).group(1)
+        match = _URL_XSEC_TOKEN_RE.match(url)
+        xsec_token = unquote_plus(match.group(1)) if match else None
         return {"note_id": note_id, "xsec_token": xsec_token}
 
     async def check_cookie(self) -> str:
-        """检测cookie是否失效"""
+        """检测cookie是否失效（结果缓存 COOKIE_STATUS_TTL 秒，并发调用只发一次请求）"""
+        if self._cookie_status is not None and time.monotonic() - self._cookie_status_ts < self.COOKIE_STATUS_TTL:
+            return self._cookie_status
+
+        probe = self._cookie_probe
+        if probe is None or probe.done() or _task_cancelling(probe):
+            # 已结束或正在被取消的检测不能再加入，否则会拿到 CancelledError；重新发起一次
+            probe = self._cookie_probe = asyncio.create_task(self._probe_cookie())
+            self._cookie_waiters = 0
+        self._cookie_waiters += 1
+        try:
+            # shield：某个调用方被取消（主请求已成功）时不影响其他等待者
+            return await asyncio.shield(probe)
+        except asyncio.CancelledError:
+            # 最后一个等待者也取消了，检测结果已无人需要，连同请求一起取消
+            if probe is self._cookie_probe:
+                self._cookie_waiters -= 1
+                if self._cookie_waiters == 0:
+                    # 立即解除引用，之后的调用方会发起新的检测而不是加入这个正在取消的
+                    self._cookie_probe = None
+                    probe.cancel()
+            raise
+
+    async def _probe_cookie(self) -> str:
+        """请求用户信息接口检测cookie，接口正常返回时缓存结果"""
         try:
             data = await self.api.get_me()
-            if 'success' in data and data['success'] == True:
-                return "COOKIE_VALID"
+            if data.get('success'):
+                status = "COOKIE_VALID"
             else:
-                return "COOKIE_INVALID"
+                status = "COOKIE_INVALID"
+            self._cookie_status = status
+            self._cookie_status_ts = time.monotonic()
+            return status
         except Exception as e:
             logger.error(e)
             return "COOKIE_INVALID"
+        finally:
+            # 只清除自己：被取消的旧检测收尾时，可能已经有新的检测在进行
+            if self._cookie_probe is asyncio.current_task():
+                self._cookie_probe = None
 
     async def home_feed(self) -> str:
         """获取首页推荐笔记"""
-        data = await self.api.home_feed()
-        result = "首页推荐结果：\n\n"
-
-        if 'data' in data and 'items' in data['data'] and len(data['data']['items']) > 0:
-            for i, item in enumerate(data['data']['items']):
+        data, cookie_task = await self._request_with_cookie_check(self.api.home_feed())
+        items = (data.get('data') or {}).get('items')
+        if items:
+            cookie_task.cancel()
+            parts = ["首页推荐结果：\n\n"]
+            for i, item in enumerate(items):
                 if 'note_card' in item and 'display_title' in item['note_card']:
                     title = item['note_card']['display_title']
                     liked_count = item['note_card']['interact_info']['liked_count']
                     url = f'https://www.xiaohongshu.com/explore/{item["id"]}?xsec_token={item["xsec_token"]}'
-                    result += f"{i+1}. {title}\n   点赞数: {liked_count}\n   链接: {url}\n\n"
+                    parts.append(f"{i+1}. {title}\n   点赞数: {liked_count}\n   链接: {url}\n\n")
+            result = ''.join(parts)
         else:
-            cookie_status = await self.check_cookie()
+            cookie_status = await cookie_task
             if "COOKIE_VALID" in cookie_status:
                 result = "未找到相关的笔记"
             else:
@@ -270,19 +468,21 @@ class XiaohongshuTool:
 
     async def search_notes(self, keywords: str) -> str:
         """搜索笔记"""
-        data = await self.api.search_notes(keywords)
+        data, cookie_task = await self._request_with_cookie_check(self.api.search_notes(keywords))
         logger.info(f'搜索关键词: {keywords}')
-        result = f"搜索结果 - {keywords}：\n\n"
-
-        if 'data' in data and 'items' in data['data'] and len(data['data']['items']) > 0:
-            for i, item in enumerate(data['data']['items']):
+        items = (data.get('data') or {}).get('items')
+        if items:
+            cookie_task.cancel()
+            parts = [f"搜索结果 - {keywords}：\n\n"]
+            for i, item in enumerate(items):
                 if 'note_card' in item and 'display_title' in item['note_card']:
                     title = item['note_card']['display_title']
                     liked_count = item['note_card']['interact_info']['liked_count']
                     url = f'https://www.xiaohongshu.com/explore/{item["id"]}?xsec_token={item["xsec_token"]}'
-                    result += f"{i+1}. {title}\n   点赞数: {liked_count}\n   链接: {url}\n\n"
+                    parts.append(f"{i+1}. {title}\n   点赞数: {liked_count}\n   链接: {url}\n\n")
+            result = ''.join(parts)
         else:
-            cookie_status = await self.check_cookie()
+            cookie_status = await cookie_task
             if "COOKIE_VALID" in cookie_status:
                 result = f"未找到与 \"{keywords}\" 相关的笔记"
             else:
@@ -293,19 +493,19 @@ class XiaohongshuTool:
     async def get_note_content(self, url: str) -> str:
         """获取笔记内容"""
         params = self.get_note_id_token(url=url)
-        data = await self.api.get_note_content(**params)
+        data, cookie_task = await self._request_with_cookie_check(self.api.get_note_content(**params))
         logger.info(f'获取笔记内容: {url}')
 
         result = ""
-        if 'data' in data and 'items' in data['data'] and len(data['data']['items']) > 0:
-            item = data['data']['items'][0]
+        items = (data.get('data') or {}).get('items')
+        if items:
+            cookie_task.cancel()
+            item = items[0]
 
             if 'note_card' in item and 'user' in item['note_card']:
                 note_card = item['note_card']
-                cover = ''
-                if 'image_list' in note_card and len(note_card['image_list']) > 0:
-                    if note_card['image_list'][0].get('url_pre'):
-                        cover = note_card['image_list'][0]['url_pre']
+                image_list = note_card.get('image_list')
+                cover = (image_list[0].get('url_pre') or '') if image_list else ''
 
                 date_format = datetime.fromtimestamp(note_card.get('time', 0) / 1000)
                 liked_count = item['note_card']['interact_info']['liked_count']
@@ -313,18 +513,21 @@ class XiaohongshuTool:
                 collected_count = item['note_card']['interact_info']['collected_count']
 
                 url = f'https://www.xiaohongshu.com/explore/{params["note_id"]}?xsec_token={params["xsec_token"]}'
-                result = f"标题: {note_card.get('title', '')}\n"
-                result += f"作者: {note_card['user'].get('nickname', '')}\n"
-                result += f"发布时间: {date_format}\n"
-                result += f"点赞数: {liked_count}\n"
-                result += f"评论数: {comment_count}\n"
-                result += f"收藏数: {collected_count}\n"
-                result += f"链接: {url}\n\n"
-                result += f"内容:\n{note_card.get('desc', '')}\n"
+                parts = [
+                    f"标题: {note_card.get('title', '')}\n",
+                    f"作者: {note_card['user'].get('nickname', '')}\n",
+                    f"发布时间: {date_format}\n",
+                    f"点赞数: {liked_count}\n",
+                    f"评论数: {comment_count}\n",
+                    f"收藏数: {collected_count}\n",
+                    f"链接: {url}\n\n",
+                    f"内容:\n{note_card.get('desc', '')}\n",
+                ]
                 if cover:
-                    result += f"\n封面: {cover}"
+                    parts.append(f"\n封面: {cover}")
+                result = ''.join(parts)
         else:
-            cookie_status = await self.check_cookie()
+            cookie_status = await cookie_task
             if "COOKIE_VALID" in cookie_status:
                 result = "获取失败"
             else:
@@ -332,19 +535,27 @@ class XiaohongshuTool:
 
         return result
 
+    async def get_many_note_contents(self, urls: List[str]) -> List[str]:
+        """并发获取多篇笔记内容（共用同一会话），结果顺序与urls一致"""
+        return await asyncio.gather(*(self.get_note_content(url) for url in urls))
+
     async def get_note_comments(self, url: str) -> str:
         """获取笔记评论"""
         params = self.get_note_id_token(url=url)
-        data = await self.api.get_note_comments(**params)
+        data, cookie_task = await self._request_with_cookie_check(self.api.get_note_comments(**params))
         logger.info(f'获取评论: {url}')
 
         result = ""
-        if 'data' in data and 'comments' in data['data'] and len(data['data']['comments']) > 0:
-            for i, item in enumerate(data['data']['comments']):
+        comments = (data.get('data') or {}).get('comments')
+        if comments:
+            cookie_task.cancel()
+            parts = []
+            for i, item in enumerate(comments):
                 date_format = datetime.fromtimestamp(item['create_time'] / 1000)
-                result += f"{i+1}. {item['user_info']['nickname']}（{date_format}）: {item['content']}\n\n"
+                parts.append(f"{i+1}. {item['user_info']['nickname']}（{date_format}）: {item['content']}\n\n")
+            result = ''.join(parts)
         else:
-            cookie_status = await self.check_cookie()
+            cookie_status = await cookie_task
             if "COOKIE_VALID" in cookie_status:
                 result = "暂无评论"
             else:
@@ -354,11 +565,12 @@ class XiaohongshuTool:
 
     async def post_comment(self, note_id: str, comment: str) -> str:
         """发表评论"""
-        response = await self.api.post_comment(note_id, comment)
-        if 'success' in response and response['success'] == True:
+        response, cookie_task = await self._request_with_cookie_check(self.api.post_comment(note_id, comment))
+        if response.get('success'):
+            cookie_task.cancel()
             return "评论发布成功"
         else:
-            cookie_status = await self.check_cookie()
+            cookie_status = await cookie_task
             if "COOKIE_VALID" in cookie_status:
                 return "评论发布失败"
             else:
@@ -386,50 +598,52 @@ async def main():
         print("可以通过 --cookie 参数或 XHS_COOKIE 环境变量提供")
         return
 
-    # 初始化工具
-    tool = XiaohongshuTool(cookie)
+    # 初始化工具（退出时关闭共用会话）
+    async with XiaohongshuTool(cookie) as tool:
+        try:
+            if args.action == 'check':
+                result = await tool.check_cookie()
+                print(result)
+
+            elif args.action == 'feed':
+                result = await tool.home_feed()
+                print(result)
+
+            elif args.action == 'search':
+                if not args.keywords:
+                    print("错误: 搜索操作需要提供 --keywords 参数")
+                    return
+                result = await tool.search_notes(args.keywords)
+                print(result)
+
+            elif args.action == 'content':
+                if not args.url:
+                    print("错误: 获取内容操作需要提供 --url 参数")
+                    return
+                result = await tool.get_note_content(args.url)
+                print(result)
+
+            elif args.action == 'comments':
+                if not args.url:
+                    print("错误: 获取评论操作需要提供 --url 参数")
+                    return
+                result = await tool.get_note_comments(args.url)
+                print(result)
+
+            elif args.action == 'post':
+                if not args.note_id or not args.comment:
+                    print("错误: 发表评论操作需要提供 --note-id 和 --comment 参数")
+                    return
+                result = await tool.post_comment(args.note_id, args.comment)
+                print(result)
 
-    try:
-        if args.action == 'check':
-            result = await tool.check_cookie()
-            print(result)
-
-        elif args.action == 'feed':
-            result = await tool.home_feed()
-            print(result)
-
-        elif args.action == 'search':
-            if not args.keywords:
-                print("错误: 搜索操作需要提供 --keywords 参数")
-                return
-            result = await tool.search_notes(args.keywords)
-            print(result)
-
-        elif args.action == 'content':
-            if not args.url:
-                print("错误: 获取内容操作需要提供 --url 参数")
-                return
-            result = await tool.get_note_content(args.url)
-            print(result)
-
-        elif args.action == 'comments':
-            if not args.url:
-                print("错误: 获取评论操作需要提供 --url 参数")
-                return
-            result = await tool.get_note_comments(args.url)
-            print(result)
-
-        elif args.action == 'post':
-            if not args.note_id or not args.comment:
-                print("错误: 发表评论操作需要提供 --note-id 和 --comment 参数")
-                return
-            result = await tool.post_comment(args.note_id, args.comment)
-            print(result)
-
-    except Exception as e:
-        logger.error(f"操作失败: {e}")
-        print(f"错误: {e}")
+        except Exception as e:
+            logger.error(f"操作失败: {e}")
+            print(f"错误: {e}")
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    if uvloop is not None:
+        uvloop.run(main())
+    else:
+        asyncio.run(main())
\ No newline at end of file